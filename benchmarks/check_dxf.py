@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Read the sample DXF files with Snippets._dxf and check what comes back.
+
+samples/extrusion.dxf has every entity kind the reader keeps, most of
+them with a (0, 0, -1) extrusion. LINEs and 3D polylines are in world
+coordinates and must come back unchanged, the 2D entities are mirrored
+(x, y, z) -> (-x, y, -z). Runs on CPython or IronPython without Revit.
+
+    python benchmarks/check_dxf.py"""
+
+import os
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR      = os.path.dirname(BENCHMARK_DIR)
+sys.path[:0]  = [os.path.join(REPO_DIR, 'lib')]
+
+from Snippets._dxf import DxfCircle, DxfLine, DxfPolyline, read_dxf
+
+# VARIABLES
+SAMPLE_DIR = os.path.join(BENCHMARK_DIR, 'samples')
+MM         = 1 / 304.8
+
+# FUNCTIONS
+def close(actual, expected):
+    return all(abs(a - e * MM) < 1e-9 for a, e in zip(actual, expected)) and len(actual) == len(expected)
+
+def check(name, condition):
+    print('{:<50}{}'.format(name, 'ok' if condition else 'FAILED'))
+    return condition
+
+def main():
+    buckets = read_dxf(os.path.join(SAMPLE_DIR, 'extrusion.dxf'))
+    line              = buckets['Arch line'][0]
+    mirrored, plain   = buckets['Site']
+    circle            = buckets['Tree'][0]
+    flat, three_d     = buckets['Building']
+
+    results = [
+        check('LINE stays in world coordinates', isinstance(line, DxfLine)
+              and close(line.start, (1000, 0, 0)) and close(line.end, (2000, 0, 0))),
+        check('mirrored LWPOLYLINE is (-x, y, -elevation)', isinstance(mirrored, DxfPolyline) and mirrored.closed
+              and close(mirrored.xs, (0, -1000, -1000, 0, 0)) and close(mirrored.ys, (0, 0, 1000, 1000, 0))
+              and close(mirrored.zs, (-500,) * 5)),
+        check('LWPOLYLINE without extrusion is unchanged', close(plain.xs, (0, 1000)) and close(plain.zs, (500, 500))),
+        check('mirrored CIRCLE is (-x, y, -z)', isinstance(circle, DxfCircle)
+              and close((circle.x, circle.y, circle.z, circle.radius), (-100, 200, -300, 50))),
+        check('mirrored 2D POLYLINE is (-x, y, -elevation)', close(flat.xs, (-10, -30)) and close(flat.ys, (20, 40))
+              and close(flat.zs, (-250, -250))),
+        check('3D POLYLINE stays in world coordinates', close(three_d.xs, (10, 40)) and close(three_d.ys, (20, 50))
+              and close(three_d.zs, (30, 60))),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the part of Autodesk.Revit.DB the Calculate panel uses.
+
+Only what lib/Snippets touches is modelled: ids, categories, parameters,
+elements, element types, levels and a FilteredElementCollector that
+evaluates its filters in Python. A SyntheticDocument (benchmarks/synthetic.py)
+owns the elements. Parameter reads are dictionary lookups here, so the
+benchmarks measure the Python side of the takeoff, not the Revit API calls."""
+
+
+class _Enum(object):
+    """Enum members are plain ints, like int(BuiltInCategory.OST_Walls) in Revit."""
+
+    def __init__(self, first, names):
+        for offset, name in enumerate(names):
+            setattr(self, name, first - offset)
+
+
+BuiltInCategory = _Enum(-2000100, [
+    'OST_Columns', 'OST_StructuralFraming', 'OST_Walls', 'OST_Floors', 'OST_Stairs',
+    'OST_Doors', 'OST_Windows', 'OST_StairsRailing', 'OST_Rooms', 'OST_Levels',
+    'OST_Furniture', 'OST_FurnitureSystems', 'OST_Casework', 'OST_PlumbingFixtures',
+    'OST_LightingFixtures', 'OST_ElectricalFixtures', 'OST_ElectricalEquipment',
+    'OST_MechanicalEquipment', 'OST_SpecialityEquipment', 'OST_GenericModel',
+    'OST_StructuralColumns', 'OST_Ceilings', 'OST_Roofs', 'OST_RoomSeparationLines'])
+
+BuiltInParameter = _Enum(-1000100, [
+    'ELEM_FAMILY_AND_TYPE_PARAM', 'ELEM_TYPE_PARAM', 'ALL_MODEL_COST',
+    'SYMBOL_FAMILY_NAME_PARAM', 'SYMBOL_NAME_PARAM', 'HOST_VOLUME_COMPUTED',
+    'FAMILY_TOP_LEVEL_PARAM', 'FAMILY_BASE_LEVEL_PARAM',
+    'FAMILY_TOP_LEVEL_OFFSET_PARAM', 'FAMILY_BASE_LEVEL_OFFSET_PARAM',
+    'STRUCTURAL_FRAME_CUT_LENGTH', 'CURVE_ELEM_LENGTH', 'WALL_USER_HEIGHT_PARAM',
+    'STAIRS_ACTUAL_NUM_RISERS', 'ROOM_NAME', 'ROOM_AREA', 'ROOM_PERIMETER',
+    'ROOM_VOLUME', 'LEVEL_ELEV'])
+
+
+class ElementId(object):
+    __slots__ = ('IntegerValue',)
+
+    def __init__(self, value):
+        self.IntegerValue = int(value)
+
+    def __eq__(self, other):
+        return isinstance(other, ElementId) and other.IntegerValue == self.IntegerValue
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.IntegerValue)
+
+    def __repr__(self):
+        return 'ElementId({})'.format(self.IntegerValue)
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class Category(object):
+    def __init__(self, bic, name):
+        self.Id   = ElementId(bic)
+        self.Name = name
+
+
+class Parameter(object):
+    """Read-only parameter over a stored value. Doubles are in internal units (feet)."""
+    __slots__ = ('_value',)
+
+    HasValue = True
+
+    def __init__(self, value):
+        self._value = value
+
+    def AsDouble(self):
+        return float(self._value)
+
+    def AsInteger(self):
+        return int(self._value)
+
+    def AsString(self):
+        return self._value
+
+    def AsValueString(self):
+        return self._value if isinstance(self._value, str) else str(self._value)
+
+    def AsElementId(self):
+        return self._value
+
+
+class Element(object):
+    def __init__(self, doc, element_id, category, parameters, type_id=None, level_id=None):
+        self.Document  = doc
+        self.Id        = ElementId(element_id)
+        self.UniqueId  = 'synthetic-{:08d}'.format(element_id)
+        self.Category  = category
+        self.LevelId   = level_id or ElementId.InvalidElementId
+        self._type_id  = type_id or ElementId.InvalidElementId
+        self._params   = parameters
+
+    def get_Parameter(self, bip):
+        value = self._params.get(bip)
+        return Parameter(value) if value is not None else None
+
+    def GetTypeId(self):
+        return self._type_id
+
+
+class ElementType(Element):
+    pass
+
+
+class FamilyInstance(Element):
+    pass
+
+
+class Wall(Element):
+    pass
+
+
+class Floor(Element):
+    pass
+
+
+class Level(Element):
+    @property
+    def Elevation(self):
+        return self._params[BuiltInParameter.LEVEL_ELEV]
+
+
+class ElementMulticategoryFilter(object):
+    def __init__(self, categories):
+        self._categories = set(int(category) for category in categories)
+
+    def passes(self, element):
+        return element.Category is not None and element.Category.Id.IntegerValue in self._categories
+
+
+class ElementLevelFilter(object):
+    def __init__(self, level_id):
+        self._level_id = level_id
+
+    def passes(self, element):
+        return element.LevelId == self._level_id
+
+
+class FilteredElementCollector(object):
+    """Filters are applied lazily to doc.elements when the collector is read."""
+
+    def __init__(self, doc, view_id=None):
+        self._doc     = doc
+        self._filters = []
+        if view_id is not None:
+            self._filters.append(lambda element: element.Id.IntegerValue in doc.view_element_ids.get(view_id.IntegerValue, ()))
+
+    def OfClass(self, element_class):
+        self._filters.append(lambda element: isinstance(element, element_class))
+        return self
+
+    def OfCategory(self, bic):
+        self._filters.append(lambda element: element.Category is not None and element.Category.Id.IntegerValue == int(bic))
+        return self
+
+    def WherePasses(self, element_filter):
+        self._filters.append(element_filter.passes)
+        return self
+
+    def WhereElementIsNotElementType(self):
+        self._filters.append(lambda element: not isinstance(element, ElementType))
+        return self
+
+    def WhereElementIsElementType(self):
+        self._filters.append(lambda element: isinstance(element, ElementType))
+        return self
+
+    def __iter__(self):
+        filters = self._filters
+        return (element for element in self._doc.elements if all(passes(element) for passes in filters))
+
+    def ToElements(self):
+        return list(self)
+
+    def FirstElement(self):
+        return next(iter(self), None)
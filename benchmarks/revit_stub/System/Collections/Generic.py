@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for System.Collections.Generic, List[T](items) is a plain list."""
+
+
+class _GenericList(list):
+    pass
+
+
+class _ListFactory(object):
+    def __getitem__(self, item_type):
+        return _GenericList
+
+
+List = _ListFactory()
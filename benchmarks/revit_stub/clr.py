@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the IronPython clr module, references are already 'loaded'."""
+
+def AddReference(name):
+    pass
+
+def ImportExtensions(module):
+    pass
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the takeoff behind the CSV and Cost buttons on synthetic documents.
+
+Every stage is timed on its own, the best of --repeat runs is kept:
+
+    extract      TakeoffEngine.run over every element
+    aggregate    per-type totals of every section
+    report       every section streamed into a csv file by CsvReportWriter
+    pricing      unit costs through the type cache and multiply()
+    incremental  TakeoffEngine.run_incremental after 1% of the walls changed
+
+Results are printed and appended to benchmarks/results.csv (one row per
+size and stage, with the commit and the Python version) so runs can be
+compared across commits. Runs on CPython 3 or IronPython, the stand-in API
+in benchmarks/revit_stub replaces Revit. Parameter reads cost a dictionary
+lookup there instead of a call into Revit, so the extract and incremental
+stages understate what the cache saves inside Revit.
+
+    python benchmarks/run_calculate.py
+    python benchmarks/run_calculate.py --sizes 1000 10000 --repeat 5"""
+
+import argparse
+import csv
+import datetime
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR      = os.path.dirname(BENCHMARK_DIR)
+sys.path[:0]  = [os.path.join(BENCHMARK_DIR, 'revit_stub'), os.path.join(REPO_DIR, 'lib'), BENCHMARK_DIR]
+
+from Autodesk.Revit.DB import BuiltInParameter
+
+from Snippets._takeoff import TakeoffEngine, collect_takeoff_elements, SECTIONS
+from Snippets._quantity_store import QUANTITIES, multiply
+from Snippets._report import CsvReportWriter
+from synthetic import SyntheticDocument
+
+# VARIABLES
+DEFAULT_SIZES   = [1000, 10000, 100000]
+RESULTS_FILE    = os.path.join(BENCHMARK_DIR, 'results.csv')
+RESULTS_HEADER  = ['date', 'commit', 'python', 'elements', 'stage', 'best_s', 'per_element_us']
+MODIFY_FRACTION = 0.01
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+# CLASSES
+class MemoryCache(object):
+    """In-memory stand-in for TakeoffCache, which keeps its records in pyRevit app data."""
+
+    def __init__(self):
+        self.records   = {}
+        self.dirty_ids = set()
+        self.reused    = 0
+        self.extracted = 0
+        self.dropped   = 0
+
+
+# FUNCTIONS
+def get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR).decode('ascii').strip()
+    except Exception:
+        return ''
+
+def best_of(repeat, setup, stage):
+    """Time stage(setup()) repeat times.
+    :return: (best time in seconds, result of the last run)"""
+    best, result = None, None
+    for _ in range(repeat):
+        state  = setup()
+        start  = timer()
+        result = stage(state)
+        elapsed = timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def new_takeoff(doc):
+    return TakeoffEngine(doc, BuiltInParameter.ELEM_FAMILY_AND_TYPE_PARAM)
+
+def extracted_takeoff(doc, elements):
+    takeoff = new_takeoff(doc)
+    takeoff.run(elements)
+    return takeoff
+
+def aggregate_sections(takeoff):
+    return dict((section, takeoff.section(section)) for section in SECTIONS)
+
+def write_report(sections, path):
+    with CsvReportWriter(path) as report:
+        for section in SECTIONS:
+            report.write_section(section)
+            for index, type_info in enumerate(sections[section], start=1):
+                report.write_row([index, type_info.type_name, type_info.count] + [type_info[name] for name in QUANTITIES])
+    return report.rows_written
+
+def price_sections(takeoff, sections):
+    total = 0.0
+    for section in SECTIONS:
+        type_infos = sections[section]
+        unit_costs = [takeoff.type_cache.get_double(type_info.type_id, BuiltInParameter.ALL_MODEL_COST)
+                      for type_info in type_infos if type_info.type_id is not None]
+        amounts    = [type_info['volume'] or type_info.count for type_info in type_infos if type_info.type_id is not None]
+        total     += sum(multiply(amounts, unit_costs))
+    return total
+
+def run_incremental(doc, elements, cache):
+    takeoff = new_takeoff(doc)
+    takeoff.run_incremental(elements, cache)
+    return takeoff
+
+def benchmark_size(element_count, repeat, report_path):
+    """:return: List of (stage, best seconds) for one document size."""
+    doc      = SyntheticDocument(element_count)
+    elements = collect_takeoff_elements(doc)
+    results  = []
+
+    seconds, _ = best_of(repeat, lambda: None, lambda _: extracted_takeoff(doc, elements))
+    results.append(('extract', seconds))
+
+    seconds, sections = best_of(repeat, lambda: extracted_takeoff(doc, elements), aggregate_sections)
+    results.append(('aggregate', seconds))
+
+    seconds, _ = best_of(repeat, lambda: None, lambda _: write_report(sections, report_path))
+    results.append(('report', seconds))
+
+    def priced_setup():
+        takeoff = extracted_takeoff(doc, elements)
+        return takeoff, aggregate_sections(takeoff)
+    seconds, _ = best_of(repeat, priced_setup, lambda state: price_sections(*state))
+    results.append(('pricing', seconds))
+
+    # A warm cache from a full run, then a small edit journaled as dirty ids.
+    warm_cache = MemoryCache()
+    run_incremental(doc, elements, warm_cache)
+    dirty_ids  = doc.modify(MODIFY_FRACTION)
+
+    def dirty_cache():
+        cache = MemoryCache()
+        cache.records   = dict(warm_cache.records)
+        cache.dirty_ids = dirty_ids
+        return cache
+    seconds, _ = best_of(repeat, dirty_cache, lambda cache: run_incremental(doc, elements, cache))
+    results.append(('incremental', seconds))
+    return results
+
+def record_results(path, rows):
+    is_new_file = not os.path.isfile(path)
+    with open(path, 'a') as results_file:
+        writer = csv.writer(results_file, lineterminator='\n')
+        if is_new_file:
+            writer.writerow(RESULTS_HEADER)
+        writer.writerows(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Calculate panel takeoff on synthetic documents.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Element counts of the documents.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage, the best one is kept.')
+    parser.add_argument('--results', default=RESULTS_FILE, help='CSV file the results are appended to.')
+    args = parser.parse_args(argv)
+
+    date    = datetime.datetime.now().isoformat()
+    commit  = get_commit()
+    python  = '{} {}'.format(platform.python_implementation(), platform.python_version())
+    rows    = []
+    report_path = os.path.join(tempfile.gettempdir(), 'takeoff_benchmark.csv')
+
+    print('{:>10}  {:<12} {:>10} {:>14}'.format('elements', 'stage', 'best (s)', 'per elem (us)'))
+    for element_count in args.sizes:
+        for stage, seconds in benchmark_size(element_count, args.repeat, report_path):
+            per_element = seconds / element_count * 1e6
+            print('{:>10}  {:<12} {:>10.4f} {:>14.2f}'.format(element_count, stage, seconds, per_element))
+            rows.append([date, commit, python, element_count, stage, round(seconds, 6), round(per_element, 3)])
+
+    record_results(args.results, rows)
+    print('Results appended to {}'.format(args.results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Synthetic Revit documents for the Calculate panel benchmarks.
+
+Import this module after the stand-in API in benchmarks/revit_stub is on
+sys.path (run_calculate.py takes care of that)."""
+
+import random
+
+from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter, Category
+from Autodesk.Revit.DB import Element, ElementType, FamilyInstance, Floor, Level, Wall
+
+BIP = BuiltInParameter
+
+# Element classes of the mix, in the order their share is handed out.
+CATEGORIES = [
+    ('Structural Columns', BuiltInCategory.OST_Columns,           FamilyInstance, 'Concrete-Rectangular-Column'),
+    ('Structural Framing', BuiltInCategory.OST_StructuralFraming, FamilyInstance, 'Concrete-Rectangular Beam'),
+    ('Walls',              BuiltInCategory.OST_Walls,             Wall,           'Basic Wall'),
+    ('Floors',             BuiltInCategory.OST_Floors,            Floor,          'Floor'),
+    ('Rooms',              BuiltInCategory.OST_Rooms,             Element,        None),
+    ('Railings',           BuiltInCategory.OST_StairsRailing,     Element,        'Railing'),
+]
+
+LEVEL_HEIGHT = 3.4 * 3.2808     # ft
+
+
+class SyntheticDocument(object):
+    """A document holding element_count elements spread evenly over CATEGORIES.
+
+    Every category has type_count element types carrying ALL_MODEL_COST and
+    family/type names, instances carry the parameters the extractors read,
+    all in internal units. The same seed always builds the same document."""
+
+    def __init__(self, element_count, type_count=20, level_count=10, seed=0):
+        self.Title            = 'Synthetic {}'.format(element_count)
+        self.PathName         = ''
+        self.elements         = []
+        self.view_element_ids = {}
+        self._by_id           = {}
+        self._next_id         = 1000
+        self._random          = random.Random(seed)
+
+        self.levels = [self._add(Level, Category(BuiltInCategory.OST_Levels, 'Levels'),
+                                 {BIP.LEVEL_ELEV: index * LEVEL_HEIGHT})
+                       for index in range(level_count)]
+
+        per_category = element_count // len(CATEGORIES)
+        for index, (name, bic, element_class, family) in enumerate(CATEGORIES):
+            category = Category(bic, name)
+            count    = per_category + (1 if index < element_count % len(CATEGORIES) else 0)
+            types    = [self._add_type(category, family, number) for number in range(type_count)] if family else []
+            for _ in range(count):
+                self._add_instance(category, element_class, types)
+
+    def GetElement(self, element_id):
+        return self._by_id.get(element_id.IntegerValue)
+
+    def _add(self, element_class, category, parameters, type_id=None, level_id=None):
+        element = element_class(self, self._next_id, category, parameters, type_id, level_id)
+        self._next_id += 1
+        self.elements.append(element)
+        self._by_id[element.Id.IntegerValue] = element
+        return element
+
+    def _add_type(self, category, family, number):
+        type_name = '{} {:02d}'.format(category.Name, number)
+        return self._add(ElementType, category, {
+            BIP.ALL_MODEL_COST:           1000.0 + 250.0 * number,
+            BIP.SYMBOL_FAMILY_NAME_PARAM: family,
+            BIP.SYMBOL_NAME_PARAM:        type_name,
+            BIP.ELEM_TYPE_PARAM:          type_name,
+            BIP.ELEM_FAMILY_AND_TYPE_PARAM: '{}: {}'.format(family, type_name)})
+
+    def _add_instance(self, category, element_class, types):
+        rnd       = self._random.random
+        level     = self.levels[int(rnd() * (len(self.levels) - 1))]
+        top_level = self.levels[self.levels.index(level) + 1]
+        bic       = category.Id.IntegerValue
+
+        if bic == BuiltInCategory.OST_Rooms:
+            area = 100.0 + 1000.0 * rnd()
+            return self._add(element_class, category, {
+                BIP.ROOM_NAME:      'Room {:02d}'.format(int(rnd() * 40)),
+                BIP.ROOM_AREA:      area,
+                BIP.ROOM_PERIMETER: 4.0 * area ** 0.5,
+                BIP.ROOM_VOLUME:    area * LEVEL_HEIGHT}, level_id=level.Id)
+
+        element_type = types[int(rnd() * len(types))]
+        parameters   = {BIP.ELEM_FAMILY_AND_TYPE_PARAM: element_type.get_Parameter(BIP.ELEM_FAMILY_AND_TYPE_PARAM).AsString(),
+                        BIP.ELEM_TYPE_PARAM:            element_type.get_Parameter(BIP.ELEM_TYPE_PARAM).AsString()}
+        if bic == BuiltInCategory.OST_Columns:
+            parameters.update({BIP.HOST_VOLUME_COMPUTED:           10.0 + 30.0 * rnd(),
+                               BIP.FAMILY_BASE_LEVEL_PARAM:        level.Id,
+                               BIP.FAMILY_TOP_LEVEL_PARAM:         top_level.Id,
+                               BIP.FAMILY_BASE_LEVEL_OFFSET_PARAM: 0.0,
+                               BIP.FAMILY_TOP_LEVEL_OFFSET_PARAM:  0.0})
+        elif bic == BuiltInCategory.OST_StructuralFraming:
+            parameters.update({BIP.HOST_VOLUME_COMPUTED:        5.0 + 20.0 * rnd(),
+                               BIP.STRUCTURAL_FRAME_CUT_LENGTH: 10.0 + 20.0 * rnd()})
+        elif bic == BuiltInCategory.OST_Walls:
+            parameters.update({BIP.HOST_VOLUME_COMPUTED:   50.0 + 200.0 * rnd(),
+                               BIP.CURVE_ELEM_LENGTH:      10.0 + 40.0 * rnd(),
+                               BIP.WALL_USER_HEIGHT_PARAM: LEVEL_HEIGHT})
+        elif bic == BuiltInCategory.OST_Floors:
+            parameters.update({BIP.HOST_VOLUME_COMPUTED: 100.0 + 900.0 * rnd()})
+        elif bic == BuiltInCategory.OST_StairsRailing:
+            parameters.update({BIP.CURVE_ELEM_LENGTH: 5.0 + 30.0 * rnd()})
+        return self._add(element_class, category, parameters, element_type.Id, level.Id)
+
+    def modify(self, fraction):
+        """Change the volume of a fraction of the walls, like a small model edit.
+        :return: Set of the integer ids of the modified elements."""
+        walls = [element for element in self.elements if isinstance(element, Wall)]
+        modified = self._random.sample(walls, int(len(walls) * fraction))
+        for wall in modified:
+            wall._params[BIP.HOST_VOLUME_COMPUTED] *= 1.1
+        return set(wall.Id.IntegerValue for wall in modified)
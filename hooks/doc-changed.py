@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Journal added, modified and deleted elements for the incremental takeoff of the Calculate panel."""
+
+from pyrevit import EXEC_PARAMS
+from Snippets._takeoff_cache import record_changes
+
+args = EXEC_PARAMS.event_args
+record_changes(args.GetDocument(),
+               list(args.GetAddedElementIds()) + list(args.GetModifiedElementIds()) + list(args.GetDeletedElementIds()))
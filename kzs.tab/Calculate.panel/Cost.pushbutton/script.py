@@ -15,6 +15,13 @@ from pyrevit import forms, revit
 
 import sys
 
+# Custom Imports
+from Snippets._selection import get_takeoff_elements
+from Snippets._quantity_store import multiply
+from Snippets._takeoff import TakeoffEngine, COLUMNS, FRAMING, WALLS, FLOORS, STAIRS, WINDOWS_DOORS, RAILINGS, FURNITURE
+from Snippets._takeoff_cache import TakeoffCache
+from Snippets._catalog import UnitPriceCatalog
+
 
 # ╦  ╦╔═╗╦═╗╦╔═╗╔╗ ╦  ╔═╗╔═╗
 # ╚╗╔╝╠═╣╠╦╝║╠═╣╠╩╗║  ║╣ ╚═╗
@@ -25,6 +32,43 @@ doc   = __revit__.ActiveUIDocument.Document
 uidoc = __revit__.ActiveUIDocument
 app   = __revit__.Application
 
+
+# ╔═╗╦ ╦╔╗╔╔═╗╔╦╗╦╔═╗╔╗╔╔═╗
+# ╠╣ ║ ║║║║║   ║ ║║ ║║║║╚═╗
+# ╚  ╚═╝╝╚╝╚═╝ ╩ ╩╚═╝╝╚╝╚═╝  FUNCTIONS
+# =================================================
+
+def get_unit_cost(takeoff, type_id, catalog=None):
+    """Unit cost of a type from the catalog, falling back to its ALL_MODEL_COST parameter.
+    :param takeoff: TakeoffEngine, type parameters are read through its type_cache.
+    :param type_id: ElementId of the element type.
+    :param catalog: UnitPriceCatalog, None to only use ALL_MODEL_COST.
+    :return:        Unit cost (NT$)."""
+    if catalog is not None:
+        price = catalog.price_of_type(takeoff.type_cache, type_id)
+        if price is not None:
+            return price
+    return takeoff.type_cache.get_double(type_id, BuiltInParameter.ALL_MODEL_COST)
+
+def get_cost_table(takeoff, section, quantity=None, catalog=None):
+    """Price every type of a takeoff section.
+    :param takeoff:  TakeoffEngine after run(), type costs are read through its type_cache.
+    :param section:  Takeoff section, e.g. COLUMNS.
+    :param quantity: Name of the quantity the unit cost applies to, None to price per piece.
+    :param catalog:  UnitPriceCatalog to price from before ALL_MODEL_COST.
+    :return:         List of dicts with type_name, cost, quantity and All_Cost."""
+    type_infos = takeoff.section(section)
+    unit_costs = [get_unit_cost(takeoff, type_info.type_id, catalog) for type_info in type_infos]
+    amounts    = [type_info[quantity] if quantity else type_info.count for type_info in type_infos]
+    type_costs = multiply(amounts, unit_costs)
+
+    return [{'type_name': type_info.type_name,
+             'cost': cost,
+             'quantity': amount,
+             'All_Cost': round(type_cost, 0)}
+            for type_info, cost, amount, type_cost in zip(type_infos, unit_costs, amounts, type_costs)]
+
+
 # ╔╦╗╔═╗╦╔╗╔
 # ║║║╠═╣║║║║
 # ╩ ╩╩ ╩╩╝╚╝  MAIN
@@ -32,38 +76,29 @@ app   = __revit__.Application
 
 try:
 
-    with forms.WarningBar(title='Pick an Element:'):
-        elements = revit.pick_elements()
+    # Picked elements, or the whole model / active view / one level gathered by a collector.
+    elements = get_takeoff_elements(doc)
+    if not elements:
+        sys.exit()
 
+    # One pass over the elements fills the per-type totals of every section.
+    # Elements unchanged since the last run in this session come from the cache.
+    takeoff = TakeoffEngine(doc, BuiltInParameter.ELEM_TYPE_PARAM)
+    cache   = TakeoffCache(doc, 'cost').load()
+    takeoff.run_incremental(elements, cache)
+    cache.save()
+
+    # Unit prices come from an optional catalog file, types it does not list use ALL_MODEL_COST.
+    catalog_path = forms.pick_file(files_filter='Unit Price Catalog (*.csv;*.json)|*.csv;*.json',
+                                   title='Select Unit Price Catalog (Cancel to use type Cost)')
+    catalog = UnitPriceCatalog.load(catalog_path) if catalog_path else None
 
     # ╔═╗╔═╗╦  ╦ ╦╔╦╗╔╗╔╔═╗  ╔═╗╔═╗╔═╗╔╦╗
     # ║  ║ ║║  ║ ║║║║║║║╚═╗  ║  ║ ║╚═╗ ║
     # ╚═╝╚═╝╩═╝╚═╝╩ ╩╝╚╝╚═╝  ╚═╝╚═╝╚═╝ ╩   COLUMNS COST
     # =========================================================================================
 
-    column_types_info = {}
-
-    for element in elements:
-        if isinstance(element, FamilyInstance):
-            if element.Symbol.Category.Id.IntegerValue == int(BuiltInCategory.OST_Columns):
-                column_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-                column_param_value = column_elem_type_param.AsValueString()
-
-                column_volume = element.get_Parameter(BuiltInParameter.HOST_VOLUME_COMPUTED).AsDouble() / 35.315
-                column_cost = element.Symbol.get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-                column_total_cost = round(column_volume * column_cost, 0)
-
-                if column_param_value not in column_types_info:
-                    column_types_info[column_param_value] = {
-                        'type_name': column_param_value,
-                        'column_cost': column_cost,
-                        'column_all_volume': column_volume,
-                        'All_Cost': column_total_cost
-                    }
-                else:
-                    column_types_info[column_param_value]['column_all_volume'] += column_volume
-                    column_types_info[column_param_value]['All_Cost'] += column_cost
-
+    column_types_info = get_cost_table(takeoff, COLUMNS, 'volume', catalog=catalog)
 
     # Print the results
     print('-' * 100)
@@ -71,11 +106,11 @@ try:
     print('-' * 100)
     print('*** Column Analysis Table: ***')
 
-    for type_info in column_types_info.values():
+    for type_info in column_types_info:
         print('-' * 100)
         print('.Column Type Name:             {}'.format(type_info['type_name']))
-        print('.Cost(per m³):             {} NT$'.format(type_info['column_cost']))
-        print('.Volume:                     {} m³'.format(type_info['column_all_volume']))
+        print('.Cost(per m³):             {} NT$'.format(type_info['cost']))
+        print('.Volume:                     {} m³'.format(type_info['quantity']))
         print('.Type Cost:             {} NT$'.format(type_info['All_Cost']))
 
 
@@ -84,40 +119,18 @@ try:
     # ╚  ╩╚═╩ ╩╩ ╩╩╝╚╝╚═╝  ╚═╝╚═╝╚═╝ ╩   FRAMING COST
     # =========================================================================================
 
-    framing_types_info = {}
-
-    for element in elements:
-        if isinstance(element, FamilyInstance):
-            if element.Symbol.Category.Id.IntegerValue == int(BuiltInCategory.OST_StructuralFraming):
-                Framing_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-                Framing_param_value = Framing_elem_type_param.AsValueString()
-
-                Framing_volume = element.get_Parameter(BuiltInParameter.HOST_VOLUME_COMPUTED).AsDouble() / 35.315
-                Framing_cost = element.Symbol.get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-                Framing_total_cost = round(Framing_volume * Framing_cost, 0)
-
-                if Framing_param_value not in framing_types_info:
-                    framing_types_info[Framing_param_value] = {
-                        'type_name': Framing_param_value,
-                        'framing_cost': Framing_cost,
-                        'framing_all_volume': Framing_volume,
-                        'All_Cost': Framing_total_cost
-                    }
-                else:
-                    framing_types_info[Framing_param_value]['framing_all_volume'] += Framing_volume
-                    framing_types_info[Framing_param_value]['All_Cost'] += Framing_cost
-
+    framing_types_info = get_cost_table(takeoff, FRAMING, 'volume', catalog=catalog)
 
     # Print the results
 
     print('-' * 100)
     print('*** Structural Framing Analysis Table: ***')
 
-    for type_info in framing_types_info.values():
+    for type_info in framing_types_info:
         print('-' * 100)
         print('.Framing Type Name:             {}'.format(type_info['type_name']))
-        print('.Cost(per m³):             {} NT$'.format(type_info['framing_cost']))
-        print('.Volume:                     {} m³'.format(type_info['framing_all_volume']))
+        print('.Cost(per m³):             {} NT$'.format(type_info['cost']))
+        print('.Volume:                     {} m³'.format(type_info['quantity']))
         print('.Type Cost:             {} NT$'.format(type_info['All_Cost']))
 
 
@@ -126,39 +139,18 @@ try:
     # ╚╩╝╩ ╩╩═╝╩═╝  ╚═╝╚═╝╚═╝ ╩  WALL COST
     # =========================================================================================
 
-    wall_types_info = {}
-
-    for element in elements:
-        if isinstance(element, Wall):
-            wall_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-            wall_param_value = wall_elem_type_param.AsValueString()
-
-            wall_volume = element.get_Parameter(BuiltInParameter.HOST_VOLUME_COMPUTED).AsDouble() / 35.315
-            wall_cost = element.WallType.get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-            wall_total_cost = round(wall_volume * wall_cost, 0)
-
-            if wall_param_value not in wall_types_info:
-                wall_types_info[wall_param_value] = {
-                    'type_name': wall_param_value,
-                    'wall_cost': wall_cost,
-                    'wall_all_volume': wall_volume,
-                    'All_Cost': wall_total_cost
-                }
-            else:
-                wall_types_info[wall_param_value]['wall_all_volume'] += wall_volume
-                wall_types_info[wall_param_value]['All_Cost'] += wall_total_cost
-
+    wall_types_info = get_cost_table(takeoff, WALLS, 'volume', catalog=catalog)
 
     # Print the results
 
     print('-' * 100)
     print('*** Wall Analysis Table: ***')
 
-    for type_info in wall_types_info.values():
+    for type_info in wall_types_info:
         print('-' * 100)
         print('.Wall Type Name:             {}'.format(type_info['type_name']))
-        print('.Cost(per m³):             {} NT$'.format(type_info['wall_cost']))
-        print('.Volume:                     {} m³'.format(type_info['wall_all_volume']))
+        print('.Cost(per m³):             {} NT$'.format(type_info['cost']))
+        print('.Volume:                     {} m³'.format(type_info['quantity']))
         print('.Type Cost:             {} NT$'.format(type_info['All_Cost']))
 
 
@@ -167,39 +159,18 @@ try:
     # ╚  ╩═╝╚═╝╚═╝╩╚═  ╚═╝╚═╝╚═╝ ╩   FLOOR COST
     # =========================================================================================
 
-    floor_types_info = {}
-
-    for element in elements:
-        if isinstance(element, Floor):
-            floor_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-            floor_param_value = floor_elem_type_param.AsValueString()
-
-            floor_volume = element.get_Parameter(BuiltInParameter.HOST_VOLUME_COMPUTED).AsDouble() / 35.315
-            floor_cost = element.FloorType.get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-            floor_total_cost = round(floor_volume * floor_cost, 0)
-
-            if floor_param_value not in floor_types_info:
-                floor_types_info[floor_param_value] = {
-                    'type_name': floor_param_value,
-                    'floor_cost': floor_cost,
-                    'floor_all_volume': floor_volume,
-                    'All_Cost': floor_total_cost
-                }
-            else:
-                floor_types_info[floor_param_value]['floor_all_volume'] += floor_volume
-                floor_types_info[floor_param_value]['All_Cost'] += floor_total_cost
-
+    floor_types_info = get_cost_table(takeoff, FLOORS, 'volume', catalog=catalog)
 
     # Print the results
 
     print('-' * 100)
     print('*** Floor Analysis Table: ***')
 
-    for type_info in floor_types_info.values():
+    for type_info in floor_types_info:
         print('-' * 100)
         print('.Floor Type Name:             {}'.format(type_info['type_name']))
-        print('.Cost(per m³):             {} NT$'.format(type_info['floor_cost']))
-        print('.Volume:                     {} m³'.format(type_info['floor_all_volume']))
+        print('.Cost(per m³):             {} NT$'.format(type_info['cost']))
+        print('.Volume:                     {} m³'.format(type_info['quantity']))
         print('.Type Cost:             {} NT$'.format(type_info['All_Cost']))
 
 
@@ -208,38 +179,18 @@ try:
     # ╚═╝ ╩ ╩ ╩╩╩╚═╚═╝  STAIRS
     # =========================================================================================
 
-    stairs_types_info = {}
-
-    for element in elements:
-        if element.Category.Name == 'Stairs':
-            stairs_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-            stairs_param_value = stairs_elem_type_param.AsValueString()
-            stairs_riser_count = element.get_Parameter(BuiltInParameter.STAIRS_ACTUAL_NUM_RISERS).AsInteger()
-            stairs_cost = doc.GetElement(element.GetTypeId()).get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-            stairs_total_cost = round(stairs_riser_count * stairs_cost, 0)
-
-            if stairs_param_value not in stairs_types_info:
-                stairs_types_info[stairs_param_value] = {
-                    'type_name': stairs_param_value,
-                    'stairs_cost': stairs_cost,
-                    'stairs_all_riser_count': stairs_riser_count,
-                    'All_Cost': stairs_total_cost
-                }
-            else:
-                stairs_types_info[stairs_param_value]['stairs_all_riser_count'] += stairs_riser_count
-                stairs_types_info[stairs_param_value]['All_Cost'] += stairs_total_cost
-
+    stairs_types_info = get_cost_table(takeoff, STAIRS, 'risers', catalog=catalog)
 
     # Print the results
 
     print('-' * 100)
     print('*** Stairs Analysis Table: ***')
 
-    for type_info in stairs_types_info.values():
+    for type_info in stairs_types_info:
         print('-' * 100)
         print('.Stair Type Name:             {}'.format(type_info['type_name']))
-        print('.Cost(per m²):             {} NT$'.format(type_info['stairs_cost']))
-        print('.Riser Count:                     {} '.format(type_info['stairs_all_riser_count']))
+        print('.Cost(per m²):             {} NT$'.format(type_info['cost']))
+        print('.Riser Count:                     {} '.format(type_info['quantity']))
         print('.Type Cost:             {} NT$'.format(type_info['All_Cost']))
 
 
@@ -249,36 +200,18 @@ try:
     # ╚╩╝╩╝╚╝═╩╝╚═╝╚╩╝╚═╝  ╩ ╩╝╚╝═╩╝  ═╩╝╚═╝╚═╝╩╚═╚═╝  ╚═╝╚═╝╚═╝ ╩   WINDOWS AND DOORS COST
     # =========================================================================================
 
-
-    windows_doors_info = {}
-
-    for element in elements:
-        if isinstance(element, FamilyInstance):
-            if (element.Symbol.Category.Id.IntegerValue == int(BuiltInCategory.OST_Doors)) or (element.Symbol.Category.Id.IntegerValue == int(BuiltInCategory.OST_Windows)):
-                windows_doors_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-                windows_doors_param_value = windows_doors_elem_type_param.AsValueString()
-
-                if windows_doors_param_value not in windows_doors_info:
-                    windows_doors_info[windows_doors_param_value] = {
-                        'type_name': windows_doors_param_value,
-                        'count': 1,
-                        'cost': element.Symbol.get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-                    }
-                else:
-                    windows_doors_info[windows_doors_param_value]['count'] += 1
+    windows_doors_info = get_cost_table(takeoff, WINDOWS_DOORS, catalog=catalog)
 
     # Print the results
     print('-' * 100)
     print('*** Windows/Doors Analysis Table: ***')
 
-    for windows_doors_type, info in windows_doors_info.items():
-        total_cost = round(info['count'] * info['cost'], 0)
-
+    for info in windows_doors_info:
         print('-' * 100)
         print('.Window/Doors Type Name:        {}'.format(info['type_name']))
         print('.Cost(per):                  {} NT$'.format(info['cost']))
-        print('.Count:                      {}'.format(info['count']))
-        print('.Type Cost:                  {} NT$'.format(total_cost))
+        print('.Count:                      {}'.format(info['quantity']))
+        print('.Type Cost:                  {} NT$'.format(info['All_Cost']))
 
 
     # ╦═╗╔═╗╦╦  ╦╔╗╔╔═╗  ╔═╗╔═╗╔═╗╔╦╗
@@ -286,39 +219,18 @@ try:
     # ╩╚═╩ ╩╩╩═╝╩╝╚╝╚═╝  ╚═╝╚═╝╚═╝ ╩   RAILING COST
     # =========================================================================================
 
-    railing_types_info = {}
-
-    for element in elements:
-        if element.Category.Name == 'Railings':
-            railing_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-            railing_param_value = railing_elem_type_param.AsValueString()
-
-            railing_length = element.get_Parameter(BuiltInParameter.CURVE_ELEM_LENGTH).AsDouble() / 3.2808
-            railing_cost = doc.GetElement(element.GetTypeId()).get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-            railing_total_cost = round(railing_length * railing_cost, 0)
-
-            if railing_param_value not in railing_types_info:
-                railing_types_info[railing_param_value] = {
-                    'type_name': railing_param_value,
-                    'railing_cost': railing_cost,
-                    'railing_all_length': railing_length,
-                    'All_Cost': railing_total_cost
-                }
-            else:
-                railing_types_info[railing_param_value]['railing_all_length'] += railing_length
-                railing_types_info[railing_param_value]['All_Cost'] += railing_total_cost
-
+    railing_types_info = get_cost_table(takeoff, RAILINGS, 'length', catalog=catalog)
 
     # Print the results
 
     print('-' * 100)
     print('*** Railing Analysis Table: ***')
 
-    for type_info in railing_types_info.values():
+    for type_info in railing_types_info:
         print('-' * 100)
         print('.Railing Type Name:             {}'.format(type_info['type_name']))
-        print('.Cost(per m²):             {} NT$'.format(type_info['railing_cost']))
-        print('.Length:                     {} m²'.format(type_info['railing_all_length']))
+        print('.Cost(per m²):             {} NT$'.format(type_info['cost']))
+        print('.Length:                     {} m²'.format(type_info['quantity']))
         print('.Type Cost:             {} NT$'.format(type_info['All_Cost']))
 
 
@@ -327,36 +239,18 @@ try:
     # ╚  ╚═╝╩╚═╝╚╝╩ ╩ ╚═╝╩╚═╚═╝  ╚═╝╚═╝╚═╝ ╩  FURNITURE COST
     # =========================================================================================
 
-
-    furniture_info = {}
-
-    for element in elements:
-        if isinstance(element, FamilyInstance):
-            if (element.Symbol.Category.Id.IntegerValue != int(BuiltInCategory.OST_Doors)) and (element.Symbol.Category.Id.IntegerValue != int(BuiltInCategory.OST_Windows)) and (element.Symbol.Category.Id.IntegerValue != int(BuiltInCategory.OST_Columns)) and (element.Symbol.Category.Id.IntegerValue != int(BuiltInCategory.OST_StructuralFraming)):
-                furniture_elem_type_param = element.get_Parameter(BuiltInParameter.ELEM_TYPE_PARAM)
-                furniture_param_value = furniture_elem_type_param.AsValueString()
-
-                if furniture_param_value not in furniture_info:
-                    furniture_info[furniture_param_value] = {
-                        'type_name': furniture_param_value,
-                        'count': 1,
-                        'cost': element.Symbol.get_Parameter(BuiltInParameter.ALL_MODEL_COST).AsDouble()
-                    }
-                else:
-                    furniture_info[furniture_param_value]['count'] += 1
+    furniture_info = get_cost_table(takeoff, FURNITURE, catalog=catalog)
 
     # Print the results
     print('-' * 100)
     print('*** Furniture Analysis Table: ***')
 
-    for furniture_type, info in furniture_info.items():
-        total_cost = round(info['count'] * info['cost'], 0)
-
+    for info in furniture_info:
         print('-' * 100)
         print('.Furniture Type Name:        {}'.format(info['type_name']))
         print('.Cost(per):                  {} NT$'.format(info['cost']))
-        print('.Count:                      {}'.format(info['count']))
-        print('.Type Cost:                  {} NT$'.format(total_cost))
+        print('.Count:                      {}'.format(info['quantity']))
+        print('.Type Cost:                  {} NT$'.format(info['All_Cost']))
 
 
 
@@ -372,35 +266,35 @@ try:
     print('-' * 100)
 
     # Total Columns Cost
-    columns_total_cost = sum(info['All_Cost'] for info in column_types_info.values())
+    columns_total_cost = sum(info['All_Cost'] for info in column_types_info)
     print('.Total Columns Cost:       {} NT$'.format(columns_total_cost))
 
     # Total Structural Framing Cost
-    Framing_total_cost = sum(info['All_Cost'] for info in framing_types_info.values())
+    Framing_total_cost = sum(info['All_Cost'] for info in framing_types_info)
     print('.Total Structural Framing Cost:       {} NT$'.format(Framing_total_cost))
 
     # Total Wall Cost
-    walls_total_cost = sum(info['All_Cost'] for info in wall_types_info.values())
+    walls_total_cost = sum(info['All_Cost'] for info in wall_types_info)
     print('.Total Wall Cost:       {} NT$'.format(walls_total_cost))
 
     # Total Floor Cost
-    floor_total_cost = sum(info['All_Cost'] for info in floor_types_info.values())
+    floor_total_cost = sum(info['All_Cost'] for info in floor_types_info)
     print('.Total Floor Cost:       {} NT$'.format(floor_total_cost))
 
     # Total Stairs Cost
-    stair_total_cost = sum(info['All_Cost'] for info in stairs_types_info.values())
+    stair_total_cost = sum(info['All_Cost'] for info in stairs_types_info)
     print('.Total Stairs Cost:       {} NT$'.format(stair_total_cost))
 
     # Total Windows/Doors Cost
-    windows_doors_total_cost = sum(round(info['count'] * info['cost'], 0) for info in windows_doors_info.values())
+    windows_doors_total_cost = sum(info['All_Cost'] for info in windows_doors_info)
     print('.Total Windows/Doors Cost:  {} NT$'.format(windows_doors_total_cost))
 
     # Total Railing Cost
-    railing_total_cost = sum(info['All_Cost'] for info in railing_types_info.values())
+    railing_total_cost = sum(info['All_Cost'] for info in railing_types_info)
     print('.Total Railing Cost:       {} NT$'.format(railing_total_cost))
 
     # Total Furniture Cost
-    furniture_total_cost = sum(round(info['count'] * info['cost'], 0) for info in furniture_info.values())
+    furniture_total_cost = sum(info['All_Cost'] for info in furniture_info)
     print('.Total Furniture Cost:  {} NT$'.format(furniture_total_cost))
 
 
@@ -408,14 +302,12 @@ try:
     # Overall Total Cost
     overall_total_cost = columns_total_cost + Framing_total_cost + walls_total_cost + floor_total_cost + stair_total_cost + windows_doors_total_cost + railing_total_cost + furniture_total_cost
     print('.Overall Total Cost:    {} NT$'.format(overall_total_cost))
+    print('-' * 100)
+    print('.Type Parameter Cache:    {}'.format(takeoff.type_cache.stats()))
+    print('.Takeoff Cache:           {}'.format(cache.stats()))
+    if catalog is not None:
+        print('.Unit Price Catalog:      {} line items ({})'.format(len(catalog), catalog_path))
 
 
 except:
     sys.exit
-
-
-
-
-
-
-
@@ -8,14 +8,16 @@ Description:
 This tool is capable of reading and importing polycurves
 from the 'Site' layer of CAD file. It uses this information
 to generate a site pad on a reasonable elevation and
-simultaneously produces 15 Level Elements. The first floor
-is set at 4.2 meters, while the subsequent floors are all
-set at 3.4 meters.
+simultaneously produces 14 Level Elements. The first floor
+is set at 4 meters, while the subsequent floors are all
+set at 3.4 meters, or at any storey heights entered.
+Existing levels at the same elevations are reused.
 _________________________________________________
 How-to:
 
 -> Select the CAD file to be generated (ImportInstance).
 -> Select the referenced topography (TopoSolid).
+-> Enter the storey heights.
 -> Generate the Site Pad and Levels.
 _______________________________________________________________________________________________
 Author: vakc"""
@@ -25,50 +27,30 @@ Author: vakc"""
 # ╩╩ ╩╩  ╚═╝╩╚═ ╩ ╚═╝  IMPORTS
 # =================================================
 
-from itertools import groupby
 import sys
 import clr
-import random
 
 clr.AddReference("RevitAPI")
 
-import Autodesk
 from Autodesk.Revit.DB import *
-from Autodesk.Revit.DB.Structure import StructuralType
-
-clr.AddReference('ProtoGeometry')
-from Autodesk.DesignScript.Geometry import *
-
-clr.AddReference("RevitNodes")
-import Revit
-clr.ImportExtensions(Revit.Elements)
-clr.ImportExtensions(Revit.GeometryConversion)
-
-clr.AddReference("RevitServices")
-import RevitServices
-from RevitServices.Persistence import DocumentManager
-from RevitServices.Transactions import TransactionManager
 
 clr.AddReference('System')
 from System.Collections.Generic import List
 
-clr.AddReference("DynamoApplications")
-from Dynamo.Applications import StartupUtils
-
 from pyrevit import forms, revit
 
+from Snippets._terrain import TerrainSampler
+from Snippets._cad import select_geometry, is_polyline
+from Snippets._selection import get_cad_layers
+from Snippets._polyclean import remove_duplicates
+from Snippets._levels import LevelStack, parse_storey_heights, GROUND_STOREY_HEIGHT, TYPICAL_STOREY_HEIGHT, LEVEL_COUNT
+
 
 # ╔═╗╦ ╦╔╗╔╔═╗╔╦╗╦╔═╗╔╗╔╔═╗
 # ╠╣ ║ ║║║║║   ║ ║║ ║║║║╚═╗
 # ╚  ╚═╝╝╚╝╚═╝ ╩ ╩╚═╝╝╚╝╚═╝  FUNCTIONS
 # =================================================
 
-def boolmask(list1, list2, condition):
-    return [elem1 for elem1, elem2 in zip(list1, list2) if elem2 == condition]
-
-def flatten_comprehension(matrix):
-    return [item for row in matrix for item in row]
-
 def create_profile(points):
     curve_loop = CurveLoop()
 
@@ -94,6 +76,9 @@ uidoc = __revit__.ActiveUIDocument
 app   = __revit__.Application
 active_view = doc.ActiveView
 
+# Level 1 and 13 storeys above it, like the design masses of Volume Placement.
+DEFAULT_STOREY_HEIGHTS = '{}, {}*{}'.format(GROUND_STOREY_HEIGHT, TYPICAL_STOREY_HEIGHT, LEVEL_COUNT - 2)
+
 
 
 
@@ -102,124 +87,75 @@ active_view = doc.ActiveView
 # ╩ ╩╩ ╩╩╝╚╝  MAIN
 # =================================================
 
-# Select the imported DWG file and create two groups: one for polylines and another for circles.
-
-
-with forms.WarningBar(title='Pick CAD File:'):
-    cad = revit.pick_element()
-    cad_import = List[ElementId]()
-    cad_import.Add(cad.Id)
-
-pline = []
-layerNames = []
-
-if cad_import.Count > 0:
-    importId = cad_import[0]
-    importInstance = doc.GetElement(importId)
-
-    if isinstance(importInstance, ImportInstance):
-        geoEle = importInstance.get_Geometry(Options())
-
-        for geoObj in geoEle:
-            if isinstance(geoObj, GeometryInstance):
-                geoInst = geoObj
-                geoElement = geoInst.GetInstanceGeometry()
-                if geoElement is not None:
-                    for obj in geoElement:
-                        if isinstance(obj, PolyLine):
-                            gStyle = doc.GetElement(obj.GraphicsStyleId)
-                            layer = gStyle.GraphicsStyleCategory.Name
-
-                            layerNames.append(layer)
-                            pline.append(obj)
+# Only the 'Site' boundary polylines are needed, from a linked DWG or a DXF file.
+cad_layers = get_cad_layers(doc, ['Site'])
+if cad_layers is None:
+    sys.exit()
+site_lines = select_geometry(cad_layers, is_polyline).get('Site', [])
+site_coordinates = [polyLine.GetCoordinates() for polyLine in site_lines]
 
 # Select the TopoSolid
 
 with forms.WarningBar(title='Pick Toposolid:'):
     toposolid = revit.pick_element()
 
-# Open up Dynamo
-
-dynamo_model = StartupUtils.MakeModel(CLImode=True)
-dynamo_model.Start()
+# Triangulate the upward faces of the toposolid once and sample the terrain height under every
+# corner of every site boundary in one query.
+terrain  = TerrainSampler.from_element(toposolid)
+profiles = terrain.profiles(site_coordinates)
 
+# Storey heights of the level stack, the default or any schedule the user types.
+heights_text = forms.ask_for_string(default=DEFAULT_STOREY_HEIGHTS,
+                                    prompt='Enter storey heights (mm), e.g. 4000, 3400*12:', title=__title__)
+if not heights_text:
+    sys.exit()
 try:
-    # this line is important because converting geometry needs a reference of
-    # DocumentManager.Instance.CurrentUIDocument, which is None if we don't set it
-    # to current uidoc (luckily, they leave it public get/set)
-    DocumentManager.Instance.CurrentUIDocument = revit.uidoc
-
-
-    # Modify toposurface to a surface
-
-    opt = Options()
-    outlist = []
-    geom = toposolid.get_Geometry(opt)
-
-    O1 = [value.ToProtoType() for value in geom]
-    S1 = [Geometry.Explode(value) for value in O1]
-    S2 = flatten_comprehension(S1)
-    N1 = [Surface.NormalAtParameter(value, 0.5, 0.5) for value in S2]
-    N2 = [value.Z for value in N1]
-    B1 = [value < 0.1 for value in N2]
-    S3 = boolmask(S2, B1, False)
-    S4 = Surface.ByUnion(S3)
-
-
-    # Transform different polygons into corresponding building masses based on layers, with a total of 9 layers of polygons to be converted.
-
-    for polyLine in pline:
-        gStyle = doc.GetElement(polyLine.GraphicsStyleId)
-        Layer = gStyle.GraphicsStyleCategory.Name
-
-        if Layer == "Site":
-            try:
-
-                O1 = polyLine.ToProtoType()
-                C1 = Surface.ProjectInputOnto(S4, O1, Vector.ZAxis())
-                C2 = PolyCurve.ByJoinedCurves(tuple(C1), 0.001, False, 0)
-                N1 = Geometry.DistanceTo(O1, C2)
-
-                P1 = O1.Points
-
-
-                LevelToCopy = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Levels).WhereElementIsNotElementType().ToElements()
-                for level in LevelToCopy:
-                    if level.Name == 'L1':
-                        level = level
-
-                floor_type_Id = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Floors).WhereElementIsElementType().ToElementIds()
-
+    storey_height = parse_storey_heights(heights_text)
+except ValueError as error:
+    forms.alert(str(error), exitscript=True)
 
-                from Autodesk.Revit.DB import Line
+# Collected once for every site boundary.
+levels        = LevelStack(doc)
+if not levels.levels:
+    forms.alert('The document has no level to place the sites on.', exitscript=True)
+template      = levels.by_name('L1') or levels.levels[0]
+floor_type_Id = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Floors).WhereElementIsElementType().ToElementIds()
 
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
 
+# Lay a floor and the level stack on every site boundary.
 
-                with Transaction(doc, __title__) as t:
+with Transaction(doc, __title__) as t:
 
-                    t.Start()
+    t.Start()
 
-                    level_1 = ElementTransformUtils.CopyElement(doc, level.Id, XYZ(0, 0, N1 / 304.8))
-                    doc.GetElement(level_1[0]).Name = 'Level 1'
+    for number, (coordinates, profile) in enumerate(zip(site_coordinates, profiles), 1):
+        if profile.count == 0:
+            print('.Site {}: skipped, no terrain of the toposolid under the boundary'.format(number))
+            continue
+        try:
 
-                    for i in range(2, 15):
-                        offset = (N1 + 4000 + (i - 2) * 3400) / 304.8
-                        new_level = ElementTransformUtils.CopyElement(doc, level.Id, XYZ(0, 0, offset))
-                        doc.GetElement(new_level[0]).Name = 'Level {}'.format(i)
+            # The pad goes to the suggested pad level, N1 above the boundary.
+            N1 = round(profile.lift * 304.8)
+            print('.Site {}: terrain {} / {} / {} mm (min / mean / max), pad at {} mm'.format(
+                number, *[round(height * 304.8) for height in (profile.minimum, profile.mean, profile.maximum, profile.pad_level)]))
 
-                    floor = Floor.Create(doc, list_boundaries, floor_type_Id[0], level_1[0])
+            # Corners of the boundary without the repeated closing corner.
+            z  = coordinates[0].Z
+            P1, _ = remove_duplicates([(point.X, point.Y) for point in coordinates])
 
+            RP1 = [XYZ(x, y, z) for x, y in P1]
+            curveloop = create_profile(RP1)
+            list_boundaries = List[CurveLoop]()
+            list_boundaries.Add(curveloop)
 
+            # Level 1 sits at the pad, N1 above the template level, the other levels on top of it.
+            stack = levels.create(template.Elevation + N1 / 304.8, storey_height)
 
-                    t.Commit()
+            floor = Floor.Create(doc, list_boundaries, floor_type_Id[0], stack[0].Id)
 
-            except:
-                pass
+        except Exception as error:
+            print('.Site {}: failed ({})'.format(number, error))
 
-finally:
-    dynamo_model.ShutDown(shutdownHost=True)
+    t.Commit()
 
+print('.Levels: {} created, {} reused'.format(levels.created, levels.reused))
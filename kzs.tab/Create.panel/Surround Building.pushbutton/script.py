@@ -29,37 +29,28 @@ Author: vakc"""
 # ╩╩ ╩╩  ╚═╝╩╚═ ╩ ╚═╝  IMPORTS
 # =================================================
 
-from itertools import groupby
 import sys
 import clr
-import random
 
 clr.AddReference("RevitAPI")
 
-import Autodesk
 from Autodesk.Revit.DB import *
 from Autodesk.Revit.DB.Structure import StructuralType
-
-clr.AddReference('ProtoGeometry')
-from Autodesk.DesignScript.Geometry import *
-
-clr.AddReference("RevitNodes")
-import Revit
-clr.ImportExtensions(Revit.Elements)
-clr.ImportExtensions(Revit.GeometryConversion)
-
-clr.AddReference("RevitServices")
-import RevitServices
-from RevitServices.Persistence import DocumentManager
-from RevitServices.Transactions import TransactionManager
+from Autodesk.Revit.Creation import FamilyInstanceCreationData
+from Autodesk.Revit.DB import Line as RevitLine
 
 clr.AddReference('System')
 from System.Collections.Generic import List
 
-clr.AddReference("DynamoApplications")
-from Dynamo.Applications import StartupUtils
+from pyrevit import forms, revit, script
 
-from pyrevit import forms, revit
+from Snippets._terrain import TerrainSampler
+from Snippets._batch import BatchCreator
+from Snippets._layer_rules import LayerRules, CLEANUP_SNAP_DIRECTIONS
+from Snippets._polyclean import clean_footprint
+from Snippets._cad import select_geometry, is_polyline, is_circle
+from Snippets._selection import get_cad_layers
+from Snippets._symbols import FamilySymbolRegistry
 
 
 # ╔═╗╦ ╦╔╗╔╔═╗╔╦╗╦╔═╗╔╗╔╔═╗
@@ -67,12 +58,6 @@ from pyrevit import forms, revit
 # ╚  ╚═╝╝╚╝╚═╝ ╩ ╩╚═╝╝╚╝╚═╝  FUNCTIONS
 # =================================================
 
-def boolmask(list1, list2, condition):
-    return [elem1 for elem1, elem2 in zip(list1, list2) if elem2 == condition]
-
-def flatten_comprehension(matrix):
-    return [item for row in matrix for item in row]
-
 def create_profile(points):
     curve_loop = CurveLoop()
 
@@ -80,24 +65,65 @@ def create_profile(points):
         start_point = points[i]
         end_point = points[(i + 1) % len(points)]  # Wrap around for the last point
 
-        line = Line.CreateBound(start_point, end_point)
+        line = RevitLine.CreateBound(start_point, end_point)
         curve_loop.Append(line)
 
     return curve_loop
 
-def get_type_by_name(type_name):
-    """Extra Function to get Family Type by name."""
-    # CREATE RULE
-    param_type = ElementId(BuiltInParameter.ALL_MODEL_TYPE_NAME)
-    f_param = ParameterValueProvider(param_type)
-    evaluator = FilterStringEquals()
-    f_rule = FilterStringRule(f_param, evaluator, type_name)
-
-    # CREATE FILTER
-    filter_type_name = ElementParameterFilter(f_rule)
-
-    # GET ELEMENTS
-    return FilteredElementCollector(doc).WherePasses(filter_type_name).WhereElementIsElementType().FirstElement()
+def extrude_profile(points, height):
+    """Extrusion of a closed profile of Revit points, height in mm."""
+    list_boundaries = List[CurveLoop]()
+    list_boundaries.Add(create_profile(points))
+    return GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, height / 304.8)
+
+def prepare_mass(polyLine, offset, rule):
+    """Extrusion of one footprint lifted by offset (mm) onto the terrain.
+    The outline is cleaned first (see Snippets._polyclean) and extruded from the
+    lowest corner of the polyline.
+    :return: (Solid or None, CleanupReport), report.problem says why there is no Solid."""
+    coordinates = polyLine.GetCoordinates()
+    elevation   = min(point.Z for point in coordinates) + offset / 304.8
+    ring, report = clean_footprint([(point.X, point.Y) for point in coordinates],
+                                   snap=rule.cleanup == CLEANUP_SNAP_DIRECTIONS)
+    if report.problem:
+        return None, report
+    try:
+        return extrude_profile([XYZ(x, y, elevation) for x, y in ring], rule.height), report
+    except Exception as error:
+        report.problem = 'extrusion failed ({})'.format(error)
+        return None, report
+
+def create_mass(item):
+    """Create one prepared building mass, item is (Solid, BuiltInCategory).
+    Called by BatchCreator inside its transaction."""
+    solid, category = item
+    shape = List[GeometryObject]([solid])
+    if not DirectShape.IsValidShape(shape):
+        raise ValueError('not a valid DirectShape geometry')
+    direct_shape = DirectShape.CreateElement(doc, ElementId(category))
+    try:
+        direct_shape.SetShape(shape)
+    except Exception:
+        # No empty DirectShape is left in the committed chunk for a mass reported as failed.
+        doc.Delete(direct_shape.Id)
+        raise
+    return direct_shape.Id
+
+def planting_data(item):
+    """Creation data of one prepared tree, item is (point, FamilySymbol).
+    Called by BatchCreator inside its transaction, the symbol must be active before the bulk call."""
+    point, symbol = item
+    symbols.activate(symbol)
+    return FamilyInstanceCreationData(point, symbol, StructuralType.NonStructural)
+
+def create_plantings(data):
+    """Place a chunk of trees with one bulk call, returns the new ElementIds."""
+    return doc.Create.NewFamilyInstances2(List[FamilyInstanceCreationData](data))
+
+def terrain_offsets(point_lists):
+    """Distance (mm) to lift each footprint or tree centre (Revit points) onto the toposolid,
+    sampled for a whole layer at once. None where no terrain of the toposolid lies under it."""
+    return [round(profile.lift * 304.8) if profile.count else None for profile in terrain.profiles(point_lists)]
 
 
 # ╦  ╦╔═╗╦═╗╦╔═╗╔╗ ╦  ╔═╗╔═╗
@@ -111,6 +137,15 @@ uidoc = __revit__.ActiveUIDocument
 app   = __revit__.Application
 active_view = doc.ActiveView
 
+# Masses and trees are created this many per transaction, 0 creates all of them in one.
+CHUNK_SIZE = 200
+
+# Layer -> mass height/category/cleanup and layer -> planting type, see layer_rules.json.
+layer_rules = LayerRules.load(script.get_bundle_file('layer_rules.json'))
+
+# Every planting type of the document, collected once for all trees.
+symbols = FamilySymbolRegistry(doc, BuiltInCategory.OST_Planting)
+
 
 # ╔╦╗╔═╗╦╔╗╔
 # ║║║╠═╣║║║║
@@ -118,753 +153,76 @@ active_view = doc.ActiveView
 # =================================================
 
 
-# Select the imported DWG file and create two groups: one for polylines and another for circles.
-with forms.WarningBar(title='Pick CAD File:'):
-    cad = revit.pick_element()
-    cad_import = List[ElementId]()
-    cad_import.Add(cad.Id)
-
-pline = []
-circle = []
-layerNames = []
-if cad_import.Count > 0:
-    importId = cad_import[0]
-    importInstance = doc.GetElement(importId)
-    if isinstance(importInstance, ImportInstance):
-        geoEle = importInstance.get_Geometry(Options())
-        for geoObj in geoEle:
-            if isinstance(geoObj, GeometryInstance):
-                geoInst = geoObj
-                geoElement = geoInst.GetInstanceGeometry()
-                if geoElement is not None:
-                    for obj in geoElement:
-                        if isinstance(obj, PolyLine):
-                            gStyle = doc.GetElement(obj.GraphicsStyleId)
-                            layer = gStyle.GraphicsStyleCategory.Name
-                            layerNames.append(layer)
-                            pline.append(obj)
-                        if hasattr(obj, 'IsCyclic') :
-                            circle.append(obj)
+# Select the imported DWG file and bucket its polylines and circles by layer,
+# keeping only the layers the rule table knows.
+cad_layers = get_cad_layers(doc, set(layer_rules.masses) | set(layer_rules.plantings))
+if cad_layers is None:
+    sys.exit()
+
+mass_buckets     = select_geometry(cad_layers, is_polyline, layer_rules.masses)
+planting_buckets = select_geometry(cad_layers, is_circle, layer_rules.plantings)
 
 # Select the TopoSolid
 with forms.WarningBar(title='Pick Toposolid:'):
     toposolid = revit.pick_element()
 
-# Open up Dynamo
-dynamo_model = StartupUtils.MakeModel(CLImode=True)
-dynamo_model.Start()
-
-try:
-    # this line is important because converting geometry needs a reference of
-    # DocumentManager.Instance.CurrentUIDocument, which is None if we don't set it
-    # to current uidoc (luckily, they leave it public get/set)
-    DocumentManager.Instance.CurrentUIDocument = revit.uidoc
-
-    # Modify toposurface to a surface
-    geom = toposolid.get_Geometry(Options())
-    O1 = [value.ToProtoType() for value in geom]
-    S1 = [Geometry.Explode(value) for value in O1]
-    S2 = flatten_comprehension(S1)
-    N1 = [Surface.NormalAtParameter(value, 0.5, 0.5) for value in S2]
-    N2 = [value.Z for value in N1]
-    B1 = [value < 0.1 for value in N2]
-    S3 = boolmask(S2, B1, False)
-
-    # Transform different polygons into corresponding building masses based on layers,
-    # with a total of 9 layers of polygons to be converted.
-    ### Logic
-    # In the first attempt, try directly generating the original Polyline. If that doesn't
-    # work, refine the vectors of each line in the polygon, and if all else fails, proceed
-    # to the next step.
-
-    for polyLine in pline:
-        gStyle = doc.GetElement(polyLine.GraphicsStyleId)
-        Layer = gStyle.GraphicsStyleCategory.Name
-
-        if Layer == "1R":
-
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value,O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1,V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 4000 / 304.8)
-
-                with Transaction(doc, "1R") as t:
-
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 4000 / 304.8)
-
-                    with Transaction(doc, "1R") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "2R":
-
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value,O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1,V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 4000 / 304.8)
-
-                with Transaction(doc, "1R") as t:
-
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 7200 / 304.8)
-
-                    with Transaction(doc, "2R") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "3R":
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1, V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 10400 / 304.8)
-
-                with Transaction(doc, "3R") as t:
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 10400 / 304.8)
-
-                    with Transaction(doc, "3R") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "4R":
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1, V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 13600 / 304.8)
-
-                with Transaction(doc, "4R") as t:
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 13600 / 304.8)
-
-                    with Transaction(doc, "4R") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "5R":
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1, V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 16800 / 304.8)
-
-                with Transaction(doc, "5R") as t:
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 16800 / 304.8)
-
-                    with Transaction(doc, "5R") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "10R":
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1, V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 32800 / 304.8)
-
-                with Transaction(doc, "10R") as t:
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 32800 / 304.8)
-
-                    with Transaction(doc, "10R") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "1S":
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1, V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 4000 / 304.8)
-
-                with Transaction(doc, "1S") as t:
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 4000 / 304.8)
-
-                    with Transaction(doc, "1S") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "2S":
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1, V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 7200 / 304.8)
-
-                with Transaction(doc, "2S") as t:
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 7200 / 304.8)
-
-                    with Transaction(doc, "2S") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-
-        if Layer == "2T":
-            try:
-                O1 = polyLine.ToProtoType()
-                N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(O1, V1)
-                P1 = O2.Points
-
-                from Autodesk.Revit.DB import Line
-
-                RP1 = [value.ToRevitType() for value in P1]
-                curveloop = create_profile(RP1)
-                options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                list_boundaries = List[CurveLoop]()
-                list_boundaries.Add(curveloop)
-
-                cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 7200 / 304.8)
-
-                with Transaction(doc, "2T") as t:
-                    t.Start()
-
-                    direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                    direct_shape.SetShape([cubic])
-
-                    t.Commit()
-            except:
-                try:
-                    O1 = polyLine.ToProtoType()
-                    N3 = round(min([Geometry.DistanceTo(value, O1) for value in S3]))
-                    V1 = Vector.Scale(Vector.ZAxis(), N3)
-                    O2 = Geometry.Translate(O1, V1)
-
-                    from Autodesk.DesignScript.Geometry import Line
-
-                    U2 = Geometry.Explode(O2)
-                    V2 = [value.Direction for value in U2]
-                    V3 = [Vector.Normalized(value) for value in V2]
-                    N4 = [round(value.X, 2) for value in V3]
-                    N5 = [round(value.Y, 2) for value in V3]
-                    V4 = [Vector.ByCoordinates(value1, value2, 0) for value1, value2 in zip(N4, N5)]
-                    P1 = [value.StartPoint for value in U2]
-                    N6 = [value.Length for value in U2]
-                    U3 = [Line.ByStartPointDirectionLength(v1, v2, v3) for v1, v2, v3 in zip(P1, V4, N6)]
-                    P2 = [value.EndPoint for value in U3]
-
-                    from Autodesk.Revit.DB import Line
-
-                    RP1 = [value.ToRevitType() for value in P2]
-                    curveloop = create_profile(RP1)
-                    options = SolidOptions(ElementId.InvalidElementId, ElementId.InvalidElementId)
-                    list_boundaries = List[CurveLoop]()
-                    list_boundaries.Add(curveloop)
-                    cubic = GeometryCreationUtilities.CreateExtrusionGeometry(list_boundaries, XYZ.BasisZ, 7200 / 304.8)
-
-                    with Transaction(doc, "2T") as t:
-
-                        t.Start()
-
-                        direct_shape = DirectShape.CreateElement(doc, ElementId(BuiltInCategory.OST_GenericModel))
-                        direct_shape.SetShape([cubic])
-
-                        t.Commit()
-                except:
-                    pass
-
-    # Call out the trees symbol.
-    # Transform different circles into corresponding planting types based on layers.
-
-    for obj in circle:
-
-        gStyle = doc.GetElement(obj.GraphicsStyleId)
-        Layer = gStyle.GraphicsStyleCategory.Name
-
-        if Layer == "apple tree":
-            try:
-                R1 = obj.ToProtoType()
-                P1 = R1.CenterPoint
-                N3 = round(min([Geometry.DistanceTo(value, P1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(P1, V1)
-
-                with Transaction(doc, "apple tree") as t:
-                    t.Start()
-
-                    RP1 = O2.ToRevitType()
-                    small_tree = get_type_by_name("Comman Apple - 6.0 Meters")
-                    if small_tree and not small_tree.IsActive:
-                        small_tree.Activate()
-
-                    doc.Create.NewFamilyInstance(RP1, small_tree, StructuralType.NonStructural)
-                    t.Commit()
-            except:
-                pass
-
-
-        if Layer == "maple tree":
-            try:
-                R1 = obj.ToProtoType()
-                P1 = R1.CenterPoint
-                N3 = round(min([Geometry.DistanceTo(value, P1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(P1, V1)
-
-                with Transaction(doc, "maple tree") as t:
-                    t.Start()
-
-                    RP1 = O2.ToRevitType()
-                    small_tree = get_type_by_name("Red Maple - 9 Meters")
-                    if small_tree and not small_tree.IsActive:
-                        small_tree.Activate()
-
-                    doc.Create.NewFamilyInstance(RP1, small_tree, StructuralType.NonStructural)
-                    t.Commit()
-            except:
-                pass
-
-
-        if Layer == "oak tree":
-            try:
-                R1 = obj.ToProtoType()
-                P1 = R1.CenterPoint
-                N3 = round(min([Geometry.DistanceTo(value, P1) for value in S3]))
-                V1 = Vector.Scale(Vector.ZAxis(), N3)
-                O2 = Geometry.Translate(P1, V1)
-
-                with Transaction(doc, "oak tree") as t:
-                    t.Start()
-
-                    RP1 = O2.ToRevitType()
-                    small_tree = get_type_by_name("Scarlet Oak - 12.5 Meters")
-                    if small_tree and not small_tree.IsActive:
-                        small_tree.Activate()
-
-                    doc.Create.NewFamilyInstance(RP1, small_tree, StructuralType.NonStructural)
-                    t.Commit()
-            except:
-                pass
-
-finally:
-    dynamo_model.ShutDown(shutdownHost=True)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# Triangulate the upward faces of the toposolid once, every footprint vertex
+# and tree centre is then lifted by sampling its height.
+terrain = TerrainSampler.from_element(toposolid)
+
+# Every mass and tree is only prepared here, they are created in batches at the end.
+masses    = []
+plantings = []
+failed    = []
+cleaned   = []
+
+# Transform the polygons of each layer into building masses with the layer's rule.
+for layer, polylines in mass_buckets.items():
+    rule    = layer_rules.masses[layer]
+    offsets = terrain_offsets([polyLine.GetCoordinates() for polyLine in polylines])
+    for index, (polyLine, offset) in enumerate(zip(polylines, offsets)):
+        label = '{} #{}'.format(layer, index)
+        if offset is None:
+            failed.append('{}: skipped, no terrain of the toposolid under it'.format(label))
+            continue
+        solid, report = prepare_mass(polyLine, offset, rule)
+        if solid is None:
+            failed.append('{}: {}'.format(label, report))
+        else:
+            masses.append((label, (solid, rule.category)))
+            if report.changed:
+                cleaned.append('{}: {}'.format(label, report))
+
+# Transform the circles of each layer into the layer's planting type, placed on the terrain.
+for layer, circles in planting_buckets.items():
+    rule    = layer_rules.plantings[layer]
+    symbol  = symbols.get(rule.type_name, rule.family_name)
+    if symbol is None:
+        failed.append('{} ({} trees): planting type "{}" is not loaded'.format(layer, len(circles), rule.type_name))
+        continue
+    centres = [obj.Center for obj in circles]
+    offsets = terrain_offsets([[centre] for centre in centres])
+    for index, (centre, offset) in enumerate(zip(centres, offsets)):
+        label = '{} #{}'.format(layer, index)
+        if offset is None:
+            failed.append('{}: skipped, no terrain of the toposolid under it'.format(label))
+            continue
+        plantings.append((label, (centre.Add(XYZ(0, 0, offset / 304.8)), symbol)))
+
+# Create every prepared mass and tree in chunked transactions of one TransactionGroup,
+# an item Revit rejects is reported instead of undoing the others.
+# Trees of all planting layers go through NewFamilyInstances2, one call per chunk.
+with BatchCreator(doc, 'Surround Buildings & Planting', CHUNK_SIZE) as batch:
+    mass_count     = batch.create(masses, create_mass)
+    planting_count = batch.create_bulk(plantings, planting_data, create_plantings)
+
+print('.Masses:     {} / {}'.format(mass_count, sum(len(polylines) for polylines in mass_buckets.values())))
+print('.Plantings:  {} / {}'.format(planting_count, sum(len(circles) for circles in planting_buckets.values())))
+print(batch.report())
+for message in failed:
+    print('  {}'.format(message))
+if cleaned:
+    print('.Cleaned footprints: {}'.format(len(cleaned)))
+    for message in cleaned:
+        print('  {}'.format(message))
 
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from Autodesk.Revit.DB import (FailureProcessingResult, FailureSeverity, IFailuresPreprocessor,
+                               Transaction, TransactionGroup, TransactionStatus)
+
+# VARIABLES
+DEFAULT_CHUNK_SIZE = 200
+
+# CLASSES
+class FailureCollector(IFailuresPreprocessor):
+    """Collect the failures of a transaction instead of showing Revit dialogs.
+    Warnings are dismissed and counted, errors roll the transaction back and
+    their messages are kept for the report."""
+
+    def __init__(self):
+        self.warnings = 0
+        self.errors   = []
+
+    def PreprocessFailures(self, failures_accessor):
+        result = FailureProcessingResult.Continue
+        for failure in failures_accessor.GetFailureMessages():
+            if failure.GetSeverity() == FailureSeverity.Warning:
+                failures_accessor.DeleteWarning(failure)
+                self.warnings += 1
+            else:
+                self.errors.append(failure.GetDescriptionText())
+                result = FailureProcessingResult.ProceedWithRollBack
+        return result
+
+
+class BatchCreator(object):
+    """Create many elements in few transactions, inside one TransactionGroup.
+
+    Items are created chunk_size at a time, so Revit regenerates once per
+    chunk instead of once per element. An exception while creating an item
+    is recorded against its label and the chunk goes on. When Revit rejects
+    a whole chunk on commit, its items are retried one transaction each so
+    only the failing ones are lost.
+
+    create_bulk() hands a whole chunk to a bulk creation call of the API
+    instead of creating its items one by one.
+
+    e.g.
+    with BatchCreator(doc, 'Surround Buildings', chunk_size=200) as batch:
+        batch.create(masses, create_mass)         # masses = [(label, solid), ...]
+        batch.create_bulk(trees, tree_data, doc.Create.NewFamilyInstances2)
+    print(batch.report())"""
+
+    def __init__(self, doc, name, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param doc:        Revit Document.
+        :param name:       Name of the TransactionGroup (shown in Undo) and its transactions.
+        :param chunk_size: Items per transaction, 0 or None puts every item in one transaction."""
+        self.doc        = doc
+        self.name       = name
+        self.chunk_size = chunk_size
+        self.created    = []
+        self.errors     = []
+        self.warnings   = 0
+        self._group     = None
+
+    def __enter__(self):
+        self._group = TransactionGroup(self.doc, self.name)
+        self._group.Start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._group.Assimilate()
+        else:
+            self._group.RollBack()
+        self._group.Dispose()
+        self._group = None
+
+    def create(self, items, create_function):
+        """Create every item.
+        :param items:           List of (label, item), the label names the item in errors.
+        :param create_function: Called with each item inside a transaction, returns what was created.
+        :return:                Number of items created."""
+        return self._create(items, lambda chunk: self._create_each(chunk, create_function))
+
+    def create_bulk(self, items, data_function, submit_function):
+        """Create every item with one bulk API call per chunk, e.g. doc.Create.NewFamilyInstances2.
+        :param items:           List of (label, item), the label names the item in errors.
+        :param data_function:   Called with each item, returns its creation data, e.g. FamilyInstanceCreationData.
+        :param submit_function: Called with the list of creation data of a chunk, returns the created ElementIds.
+        :return:                Number of items created."""
+        return self._create(items, lambda chunk: self._create_all(chunk, data_function, submit_function))
+
+    def _create(self, items, chunk_function):
+        items      = list(items)
+        chunk_size = self.chunk_size or len(items) or 1
+        created    = len(self.created)
+        for first in range(0, len(items), chunk_size):
+            self._create_chunk(items[first:first + chunk_size], chunk_function)
+        return len(self.created) - created
+
+    @staticmethod
+    def _create_each(chunk, create_function):
+        created, errors = [], []
+        for label, item in chunk:
+            try:
+                created.append(create_function(item))
+            except Exception as error:
+                errors.append((label, str(error)))
+        return created, errors
+
+    @staticmethod
+    def _create_all(chunk, data_function, submit_function):
+        data, errors = [], []
+        for label, item in chunk:
+            try:
+                data.append(data_function(item))
+            except Exception as error:
+                errors.append((label, str(error)))
+        # An exception of the bulk call itself fails the whole chunk.
+        created = list(submit_function(data)) if data else []
+        return created, errors
+
+    def _create_chunk(self, chunk, chunk_function):
+        collector = FailureCollector()
+        created, errors, failure = [], [], None
+
+        with Transaction(self.doc, self.name) as t:
+            options = t.GetFailureHandlingOptions()
+            options.SetFailuresPreprocessor(collector)
+            options.SetClearAfterRollback(True)
+            t.SetFailureHandlingOptions(options)
+            t.Start()
+
+            try:
+                created, errors = chunk_function(chunk)
+            except Exception as error:
+                failure = str(error)
+
+            if failure is None:
+                status = t.Commit()
+            else:
+                status = t.RollBack()
+
+        if status == TransactionStatus.Committed:
+            self.created.extend(created)
+            self.errors.extend(errors)
+            self.warnings += collector.warnings
+        elif len(chunk) > 1:
+            for item in chunk:
+                self._create_chunk([item], chunk_function)
+        else:
+            self.errors.append((chunk[0][0], failure or '; '.join(collector.errors) or 'Rolled back by Revit'))
+
+    def report(self):
+        """:return: Text summary, one line per failed item, e.g. 'created: 1980, failed: 20, warnings: 3'"""
+        lines = ['created: {}, failed: {}, warnings: {}'.format(len(self.created), len(self.errors), self.warnings)]
+        lines.extend('  {}: {}'.format(label, message) for label, message in self.errors)
+        return '\n'.join(lines)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from collections import OrderedDict
+
+from Autodesk.Revit.DB import GeometryInstance, ImportInstance, Options
+
+# FUNCTIONS
+def is_polyline(geometry_object):
+    """PolyLine of a CAD import (anything with GetCoordinates)."""
+    return hasattr(geometry_object, 'GetCoordinates')
+
+def is_circle(geometry_object):
+    """Closed arc or ellipse of a CAD import (anything cyclic with a Center)."""
+    return hasattr(geometry_object, 'Center') and getattr(geometry_object, 'IsCyclic', False)
+
+def bucket_by_layer(objects, layer_of, layers=None):
+    """Group objects by their layer in one pass.
+    :param objects:  Iterable of CAD geometry objects.
+    :param layer_of: Function object -> layer name.
+    :param layers:   Only keep these layers, all layers by default.
+    :return:         OrderedDict, layer name -> list of objects in drawing order."""
+    buckets = OrderedDict()
+    for geometry_object in objects:
+        layer = layer_of(geometry_object)
+        if layers is None or layer in layers:
+            buckets.setdefault(layer, []).append(geometry_object)
+    return buckets
+
+def select_geometry(buckets, predicate, layers=None):
+    """Keep the objects of some layers that pass a test, e.g. the polylines of the mass layers.
+    :param buckets:   OrderedDict, layer name -> objects, see extract_by_layer.
+    :param predicate: Function object -> bool, e.g. is_polyline.
+    :param layers:    Only keep these layers, all layers by default.
+    :return:          OrderedDict, layer name -> list of objects, without empty layers."""
+    selected = OrderedDict()
+    for layer, objects in buckets.items():
+        if layers is not None and layer not in layers:
+            continue
+        objects = [geometry_object for geometry_object in objects if predicate(geometry_object)]
+        if objects:
+            selected[layer] = objects
+    return selected
+
+def iter_import_geometry(import_instance, options=None):
+    """Yield the geometry objects of an ImportInstance, nothing for any other element."""
+    if not isinstance(import_instance, ImportInstance):
+        return
+    for geometry_object in import_instance.get_Geometry(options or Options()):
+        if isinstance(geometry_object, GeometryInstance):
+            instance_geometry = geometry_object.GetInstanceGeometry()
+            if instance_geometry is not None:
+                for instance_object in instance_geometry:
+                    yield instance_object
+
+def extract_by_layer(doc, import_instance, layers=None, options=None):
+    """Walk the geometry of a CAD import once and group it by layer name.
+    :param doc:             Revit Document of the import.
+    :param import_instance: ImportInstance, e.g. the picked DWG.
+    :param layers:          Only keep these layers, all layers by default.
+    :param options:         Geometry Options, default Options().
+    :return:                OrderedDict, layer name -> list of geometry objects in drawing order."""
+    return bucket_by_layer(iter_import_geometry(import_instance, options), LayerNames(doc), layers)
+
+
+# CLASSES
+class LayerNames(object):
+    """Layer name of CAD geometry objects, each GraphicsStyle is looked up once.
+
+    An import holds thousands of objects on a handful of layers, so the
+    GraphicsStyleId -> name map stays tiny while doc.GetElement runs once
+    per layer instead of once per object.
+
+    e.g.
+    layer_of = LayerNames(doc)
+    layer    = layer_of(poly_line)"""
+
+    def __init__(self, doc):
+        self.doc    = doc
+        self._names = {}
+
+    def __call__(self, geometry_object):
+        """:return: Layer name, None for an object without a GraphicsStyle."""
+        style_id = geometry_object.GraphicsStyleId.IntegerValue
+        if style_id not in self._names:
+            style = self.doc.GetElement(geometry_object.GraphicsStyleId)
+            self._names[style_id] = style.GraphicsStyleCategory.Name if style is not None else None
+        return self._names[style_id]
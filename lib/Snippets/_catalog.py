@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+import csv
+import io
+import json
+import os
+
+from Autodesk.Revit.DB import BuiltInParameter
+
+# VARIABLES
+CATALOG_FIELDS = ['Category', 'Family', 'Type', 'Unit Price']
+
+# FUNCTIONS
+def _normalize(name):
+    return (name or u'').strip().lower()
+
+
+# CLASSES
+class UnitPriceCatalog(object):
+    """Unit prices keyed by category, family and type name.
+
+    All line items sit in one dict keyed by the normalized
+    (category, family, type) names. A line item with an empty type is the
+    default of its family, one with an empty family and type is the default
+    of its category. A lookup tries the three keys from specific to general,
+    so it stays O(1) whatever the size of the catalog.
+
+    The unit price is per unit of the quantity the Cost button prices the
+    category by (m³ for columns, framing, walls and floors, riser for stairs,
+    m for railings, piece for windows, doors and furniture), like ALL_MODEL_COST.
+
+    e.g. catalog.csv
+    Category,Family,Type,Unit Price
+    Walls,Basic Wall,RC 200mm,4200
+    Walls,,,3800
+    Doors,Single-Flush,,6500"""
+
+    def __init__(self):
+        self._prices = {}
+
+    def __len__(self):
+        return len(self._prices)
+
+    @classmethod
+    def load(cls, path):
+        """Read a catalog from a .csv file with CATALOG_FIELDS as header,
+        or a .json file holding a list of objects with the same keys.
+        :return: UnitPriceCatalog"""
+        catalog = cls()
+        if os.path.splitext(path)[1].lower() == '.json':
+            with io.open(path, 'r', encoding='utf-8-sig') as json_file:
+                items = json.load(json_file)
+        else:
+            with io.open(path, 'r', newline='', encoding='utf-8-sig') as csv_file:
+                items = list(csv.DictReader(csv_file))
+
+        for item in items:
+            price = item.get('Unit Price')
+            if price in (None, ''):
+                continue
+            catalog.add(item.get('Category'), item.get('Family'), item.get('Type'), float(price))
+        return catalog
+
+    def add(self, category, family, type_name, price):
+        """Add or replace one line item. Leave type_name (and family) empty for a default."""
+        self._prices[(_normalize(category), _normalize(family), _normalize(type_name))] = price
+
+    def lookup(self, category, family, type_name):
+        """:return: Unit price of the type, else the family default, else the category default, else None."""
+        category, family, type_name = _normalize(category), _normalize(family), _normalize(type_name)
+        prices = self._prices
+        price  = prices.get((category, family, type_name))
+        if price is None:
+            price = prices.get((category, family, u''))
+            if price is None:
+                price = prices.get((category, u'', u''))
+        return price
+
+    def price_of_type(self, type_cache, type_id):
+        """Look up an element type by its category, family and type name.
+        :param type_cache: TypeParameterCache the names are read through.
+        :param type_id:    ElementId of the element type.
+        :return:           Unit price, None when the catalog has no matching line item."""
+        element_type = type_cache.get_type(type_id)
+        if element_type is None or element_type.Category is None:
+            return None
+        return self.lookup(element_type.Category.Name,
+                           type_cache.get_string(type_id, BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM),
+                           type_cache.get_string(type_id, BuiltInParameter.SYMBOL_NAME_PARAM))
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Streaming reader of ASCII DXF files, the offline alternative to a DWG linked into Revit.
+
+Only LWPOLYLINE, POLYLINE (with its VERTEX records), CIRCLE and LINE
+entities of model space are kept, as compact coordinate arrays in Revit internal feet.
+The file is read one group code/value pair at a time, entities on layers
+that are not asked for are skipped while parsing without storing a point.
+
+The reader itself needs no Revit API and can be run on sample files from
+any Python, to_revit_buckets() turns its result into the PolyLines, Arcs
+and Lines of the ImportInstance path (see Snippets._cad).
+
+Limits: blocks (INSERT) are not expanded, polyline bulges are read as
+straight segments, entities are taken in world coordinates except for the
+mirrored (0, 0, -1) extrusion of 2D entities, and the drawing origin is the
+Revit origin. benchmarks/check_dxf.py reads the sample files next to it."""
+
+# IMPORTS
+import io
+from array import array
+from collections import OrderedDict
+from math import pi
+
+# VARIABLES
+# $INSUNITS -> feet per drawing unit. Unitless drawings are read as mm like the rest of the extension.
+FEET_PER_UNIT = {0: 1 / 304.8,
+                 1: 1 / 12.0,
+                 2: 1.0,
+                 4: 1 / 304.8,
+                 5: 1 / 30.48,
+                 6: 1 / 0.3048}
+DEFAULT_UNITS = 4
+
+POLYLINE_CLOSED = 1
+POLYLINE_3D     = 8
+POLYLINE_MESH   = 16 | 64       # 3D polygon mesh and polyface mesh, not outlines.
+VERTEX_FACE     = 128           # Face record of a polyface mesh.
+
+BINARY_SENTINEL = 'AutoCAD Binary DXF'
+
+# FUNCTIONS
+def iter_group_pairs(lines):
+    """Yield the (group code, value) pairs of a DXF, two lines each.
+    :param lines: Iterable of text lines, e.g. an open file.
+    :return:      Generator of (int, str)."""
+    lines = iter(lines)
+    for code in lines:
+        value = next(lines, None)
+        if value is None:
+            return
+        if code.startswith(BINARY_SENTINEL):
+            raise ValueError('Binary DXF is not supported, save the drawing as ASCII DXF')
+        yield int(code), value.strip()
+
+def parse_dxf(lines, layers=None, unit_scale=None):
+    """Read the polylines, circles and lines of a DXF text.
+    :param lines:      Iterable of text lines, e.g. an open file.
+    :param layers:     Only keep these layers, all layers by default.
+    :param unit_scale: Feet per drawing unit, read from $INSUNITS by default.
+    :return:           OrderedDict, layer name -> list of DxfPolyline / DxfCircle / DxfLine in drawing order."""
+    buckets  = OrderedDict()
+    units    = DEFAULT_UNITS
+    section  = None
+    variable = None
+    entity   = None     # Entity being read, None when it is not one we keep.
+    polyline = None     # Open POLYLINE collecting its VERTEX records.
+
+    for code, value in iter_group_pairs(lines):
+        if code == 0:
+            scale = unit_scale or FEET_PER_UNIT.get(units, FEET_PER_UNIT[DEFAULT_UNITS])
+            if entity is not None:
+                if entity.kind == 'POLYLINE':
+                    polyline = entity
+                    polyline.start_vertices()
+                elif entity.kind == 'VERTEX':
+                    if polyline is not None and not polyline.skip:
+                        polyline.add_vertex(entity)
+                else:
+                    _keep(buckets, entity.finish(scale))
+            if value == 'SEQEND' and polyline is not None:
+                _keep(buckets, polyline.finish(scale))
+                polyline = None
+
+            entity = None
+            if value == 'ENDSEC':
+                section = None
+            elif section == 'ENTITIES' and value in _EntityReader.KINDS:
+                entity = _EntityReader(value, layers)
+            elif value == 'SECTION':
+                section = value
+            continue
+
+        if section == 'SECTION':
+            section = value if code == 2 else section
+        elif section == 'HEADER':
+            if code == 9:
+                variable = value
+            elif variable == '$INSUNITS' and code == 70:
+                units = int(value)
+        elif entity is not None:
+            entity.read(code, value)
+
+    return buckets
+
+def read_dxf(path, layers=None, unit_scale=None, encoding='utf-8'):
+    """parse_dxf() of a file.
+    :param path:     Path of an ASCII DXF.
+    :param encoding: Text encoding, R2007 and later files are utf-8.
+    :return:         OrderedDict, layer name -> list of DxfPolyline / DxfCircle / DxfLine."""
+    with io.open(path, 'r', encoding=encoding, errors='replace') as dxf_file:
+        return parse_dxf(dxf_file, layers, unit_scale)
+
+def to_revit_buckets(buckets):
+    """The PolyLines, cyclic Arcs and Lines a linked DWG would give for the same entities.
+    :param buckets: OrderedDict from read_dxf.
+    :return:        OrderedDict, layer name -> list of Revit geometry."""
+    # Imported here so the reader stays usable without the Revit API.
+    from Autodesk.Revit.DB import Arc, Line, Plane, PolyLine, XYZ
+    from System.Collections.Generic import List
+
+    def to_revit(entity):
+        if isinstance(entity, DxfCircle):
+            plane = Plane.CreateByNormalAndOrigin(XYZ.BasisZ, XYZ(entity.x, entity.y, entity.z))
+            return Arc.Create(plane, entity.radius, 0, 2 * pi)
+        if isinstance(entity, DxfLine):
+            return Line.CreateBound(XYZ(*entity.start), XYZ(*entity.end))
+        return PolyLine.Create(List[XYZ]([XYZ(x, y, z) for x, y, z in entity.points()]))
+
+    return OrderedDict((layer, [to_revit(entity) for entity in entities]) for layer, entities in buckets.items())
+
+def _keep(buckets, entity):
+    if entity is not None:
+        buckets.setdefault(entity.layer, []).append(entity)
+
+
+# CLASSES
+class DxfPolyline(object):
+    """Polyline of a DXF in feet, corners in three flat arrays.
+    A closed polyline repeats its first corner at the end."""
+    __slots__ = ('layer', 'xs', 'ys', 'zs', 'closed')
+
+    def __init__(self, layer, xs, ys, zs, closed=False):
+        self.layer  = layer
+        self.xs     = xs
+        self.ys     = ys
+        self.zs     = zs
+        self.closed = closed
+
+    def __len__(self):
+        return len(self.xs)
+
+    def points(self):
+        """:return: List of (x, y, z)."""
+        return list(zip(self.xs, self.ys, self.zs))
+
+
+class DxfCircle(object):
+    """Circle of a DXF in feet."""
+    __slots__ = ('layer', 'x', 'y', 'z', 'radius')
+
+    def __init__(self, layer, x, y, z, radius):
+        self.layer  = layer
+        self.x      = x
+        self.y      = y
+        self.z      = z
+        self.radius = radius
+
+
+class DxfLine(object):
+    """Line of a DXF in feet, start and end are (x, y, z)."""
+    __slots__ = ('layer', 'start', 'end')
+
+    def __init__(self, layer, start, end):
+        self.layer = layer
+        self.start = start
+        self.end   = end
+
+
+class _EntityReader(object):
+    """Group codes of one entity while it is being read."""
+    KINDS = ('LWPOLYLINE', 'POLYLINE', 'VERTEX', 'CIRCLE', 'LINE')
+
+    def __init__(self, kind, layers):
+        self.kind      = kind
+        self.layers    = layers
+        self.layer     = None
+        self.skip      = False
+        self.flags     = 0
+        self.elevation = 0.0
+        self.radius    = 0.0
+        self.mirrored  = False
+        self.xs        = array('d')
+        self.ys        = array('d')
+        self.zs        = array('d')
+
+    def read(self, code, value):
+        if code == 8:
+            self.layer = value
+            # VERTEX records belong to the layer of their POLYLINE.
+            if self.kind != 'VERTEX' and self.layers is not None and value not in self.layers:
+                self.skip = True
+        elif self.skip:
+            return
+        elif code == 67:
+            self.skip = value == '1'        # Paper space.
+        elif code in (11, 21, 31):
+            # End point of a LINE, kept after its start point.
+            (self.xs, self.ys, self.zs)[code // 10 - 1].append(float(value))
+        elif code == 10:
+            self.xs.append(float(value))
+        elif code == 20:
+            self.ys.append(float(value))
+        elif code == 30:
+            self.zs.append(float(value))
+        elif code == 38:
+            self.elevation = float(value)
+        elif code == 40:
+            self.radius = float(value)
+        elif code == 70:
+            self.flags = int(value)
+        elif code == 230:
+            self.mirrored = float(value) < 0
+
+    def start_vertices(self):
+        """Called when the POLYLINE record ends, its own 10/20/30 point is a dummy whose z is the elevation."""
+        if self.zs:
+            self.elevation = self.zs[0]
+        self.xs, self.ys, self.zs = array('d'), array('d'), array('d')
+
+    def add_vertex(self, vertex):
+        """Append a VERTEX record to this POLYLINE, a 2D polyline keeps its vertices at its elevation."""
+        if vertex.flags & VERTEX_FACE or not vertex.xs or not vertex.ys:
+            return
+        self.xs.append(vertex.xs[0])
+        self.ys.append(vertex.ys[0])
+        self.zs.append(vertex.zs[0] if self.flags & POLYLINE_3D and vertex.zs else self.elevation)
+
+    def finish(self, scale):
+        """:return: DxfPolyline / DxfCircle / DxfLine in feet, None for a skipped or degenerate entity."""
+        if self.skip or self.layer is None:
+            return None
+        # LINEs and 3D polylines are in world coordinates. The others are in the coordinates of their
+        # extrusion, which for (0, 0, -1) is the world seen from below: (x, y, z) -> (-x, y, -z).
+        in_world = self.kind == 'LINE' or (self.kind == 'POLYLINE' and self.flags & POLYLINE_3D)
+        sign = -1 if self.mirrored and not in_world else 1
+
+        if self.kind == 'CIRCLE':
+            if not self.xs or not self.ys or self.radius <= 0:
+                return None
+            z = self.zs[0] if self.zs else 0.0
+            return DxfCircle(self.layer, sign * self.xs[0] * scale, self.ys[0] * scale, sign * z * scale, self.radius * scale)
+
+        if self.kind == 'LINE':
+            if len(self.xs) < 2 or len(self.ys) < 2:
+                return None
+            zs = self.zs if len(self.zs) == 2 else (0.0, 0.0)
+            start, end = [(self.xs[i] * scale, self.ys[i] * scale, zs[i] * scale) for i in (0, 1)]
+            return DxfLine(self.layer, start, end)
+
+        if self.kind == 'POLYLINE':
+            if self.flags & POLYLINE_MESH:
+                return None
+            xs, ys, zs = self.xs, self.ys, self.zs
+        else:
+            xs, ys = self.xs, self.ys
+            zs = array('d', [self.elevation] * len(xs))
+
+        count = min(len(xs), len(ys), len(zs))
+        if count < 2:
+            return None
+        xs = array('d', [sign * x * scale for x in xs[:count]])
+        ys = array('d', [y * scale for y in ys[:count]])
+        zs = array('d', [sign * z * scale for z in zs[:count]])
+
+        closed = bool(self.flags & POLYLINE_CLOSED)
+        if closed and (xs[0], ys[0], zs[0]) != (xs[-1], ys[-1], zs[-1]):
+            xs.append(xs[0])
+            ys.append(ys[0])
+            zs.append(zs[0])
+        return DxfPolyline(self.layer, xs, ys, zs, closed)
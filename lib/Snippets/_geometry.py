@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from math import atan2, cos, degrees, radians, sin, sqrt
+
+# VARIABLES
+TOLERANCE = 1e-9
+
+# FUNCTIONS
+# Plane geometry on plain coordinates. Points are (x, y) tuples, polygons are
+# open rings of points (the last corner is not repeated). Units are those of
+# the coordinates, the Create tools work in mm.
+
+def distance(point0, point1):
+    return sqrt((point1[0] - point0[0]) ** 2 + (point1[1] - point0[1]) ** 2)
+
+def direction_angle(start, end):
+    """Angle of the direction start -> end from the X axis, in degrees (-180, 180]."""
+    return degrees(atan2(end[1] - start[1], end[0] - start[0]))
+
+def translate(points, dx, dy):
+    """Points moved by (dx, dy)."""
+    return [(x + dx, y + dy) for x, y in points]
+
+def move_along(point, angle, length):
+    """Point moved by length in the direction angle (degrees)."""
+    return (point[0] + length * cos(radians(angle)), point[1] + length * sin(radians(angle)))
+
+def polygon_area(points):
+    """Shoelace area of a ring, positive for counterclockwise."""
+    area = 0.0
+    for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+        area += x0 * y1 - x1 * y0
+    return area / 2.0
+
+def polygon_normal(points):
+    """Unit normal of a 3D ring of (x, y, z) by Newell's method, counterclockwise seen from its tip.
+    :return: (nx, ny, nz), (0, 0, 0) for a degenerate ring."""
+    nx = ny = nz = 0.0
+    for (x0, y0, z0), (x1, y1, z1) in zip(points, points[1:] + points[:1]):
+        nx += (y0 - y1) * (z0 + z1)
+        ny += (z0 - z1) * (x0 + x1)
+        nz += (x0 - x1) * (y0 + y1)
+    length = sqrt(nx * nx + ny * ny + nz * nz)
+    if length < TOLERANCE:
+        return (0.0, 0.0, 0.0)
+    return (nx / length, ny / length, nz / length)
+
+def centroid(points):
+    """Mean of the corners, the centre of a rectangle."""
+    count = float(len(points))
+    return (sum(x for x, y in points) / count, sum(y for x, y in points) / count)
+
+def counterclockwise(points):
+    """The ring, reversed if it runs clockwise."""
+    points = list(points)
+    return points if polygon_area(points) >= 0 else points[::-1]
+
+def distance_to_segment(point, start, end):
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    length = float(dx * dx + dy * dy)
+    if length == 0:
+        return distance(point, start)
+    t = max(0.0, min(1.0, ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length))
+    return distance(point, (start[0] + t * dx, start[1] + t * dy))
+
+def distance_to_polygon(point, ring):
+    """Distance from a point to the outline of a ring, inside or outside."""
+    return min(distance_to_segment(point, ring[i - 1], ring[i]) for i in range(len(ring)))
+
+def segments_cross(edge0, edge1):
+    """True when two segments ((x, y), (x, y)) cross at a point inside both."""
+    (ax, ay), (bx, by) = edge0
+    (cx, cy), (dx, dy) = edge1
+    d1 = (dx - cx) * (ay - cy) - (dy - cy) * (ax - cx)
+    d2 = (dx - cx) * (by - cy) - (dy - cy) * (bx - cx)
+    d3 = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    d4 = (bx - ax) * (dy - ay) - (by - ay) * (dx - ax)
+    return d1 * d2 < 0 and d3 * d4 < 0
+
+def polygon_distance(ring0, ring1):
+    """Shortest distance between the outlines of two rings, 0 when they cross."""
+    edges0 = [(ring0[i - 1], ring0[i]) for i in range(len(ring0))]
+    edges1 = [(ring1[i - 1], ring1[i]) for i in range(len(ring1))]
+    shortest = None
+    for edge0 in edges0:
+        for edge1 in edges1:
+            if segments_cross(edge0, edge1):
+                return 0.0
+            gap = min(distance_to_segment(edge0[0], *edge1), distance_to_segment(edge0[1], *edge1),
+                      distance_to_segment(edge1[0], *edge0), distance_to_segment(edge1[1], *edge0))
+            if shortest is None or gap < shortest:
+                shortest = gap
+    return shortest
+
+def point_in_polygon(point, ring, tolerance=TOLERANCE):
+    """Even-odd test, a point on the outline (within tolerance) counts as inside."""
+    if distance_to_polygon(point, ring) <= tolerance:
+        return True
+    x, y   = point
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring[-1:] + ring[:-1], ring):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / float(y1 - y0):
+            inside = not inside
+    return inside
+
+def line_intersection(point0, angle0, point1, angle1):
+    """Crossing of two lines given by a point and a direction (degrees), None when parallel."""
+    dx0, dy0 = cos(radians(angle0)), sin(radians(angle0))
+    dx1, dy1 = cos(radians(angle1)), sin(radians(angle1))
+    cross = dx0 * dy1 - dy0 * dx1
+    if abs(cross) < TOLERANCE:
+        return None
+    t = ((point1[0] - point0[0]) * dy1 - (point1[1] - point0[1]) * dx1) / cross
+    return (point0[0] + t * dx0, point0[1] + t * dy0)
+
+def offset_polygon(ring, offset):
+    """Planar offset of a ring, every edge moved by offset with mitred corners.
+    :param offset: Positive grows the ring, negative shrinks it (e.g. -3500 for a setback).
+    :return:       Counterclockwise ring, same corner count."""
+    ring  = counterclockwise(ring)
+    lines = []
+    for start, end in zip(ring, ring[1:] + ring[:1]):
+        angle = direction_angle(start, end)
+        # The outside of a counterclockwise ring is on the right of its edges.
+        lines.append((move_along(start, angle - 90, offset), angle))
+    corners = []
+    for i in range(len(lines)):
+        corner = line_intersection(lines[i - 1][0], lines[i - 1][1], lines[i][0], lines[i][1])
+        corners.append(corner if corner is not None else lines[i][0])
+    return corners
+
+def rectangle(center, angle, width, length):
+    """Counterclockwise corners of a rectangle.
+    :param center: (x, y) centre.
+    :param angle:  Direction of the width side, degrees from the X axis.
+    :param width:  Size along angle.
+    :param length: Size across angle."""
+    ux, uy = cos(radians(angle)) * width / 2, sin(radians(angle)) * width / 2
+    vx, vy = -sin(radians(angle)) * length / 2, cos(radians(angle)) * length / 2
+    cx, cy = center
+    return [(cx - ux - vx, cy - uy - vy), (cx + ux - vx, cy + uy - vy),
+            (cx + ux + vx, cy + uy + vy), (cx - ux + vx, cy - uy + vy)]
+
+def union_area(rectangles, angle=0.0):
+    """Area covered by rectangles that are all aligned to one direction, overlaps counted once.
+    :param rectangles: Rings of 4 corners, e.g. from rectangle().
+    :param angle:      Direction the rectangles are aligned to, degrees.
+    :return:           Area of their union."""
+    # Turn every rectangle into an axis aligned box of the rotated frame, then add up the
+    # covered cells of the grid their edges make.
+    c, s  = cos(radians(-angle)), sin(radians(-angle))
+    boxes = []
+    for corners in rectangles:
+        us = [x * c - y * s for x, y in corners]
+        vs = [x * s + y * c for x, y in corners]
+        boxes.append((min(us), min(vs), max(us), max(vs)))
+    if not boxes:
+        return 0.0
+
+    u_edges = sorted(set([box[0] for box in boxes] + [box[2] for box in boxes]))
+    area    = 0.0
+    for u0, u1 in zip(u_edges, u_edges[1:]):
+        spans = sorted((box[1], box[3]) for box in boxes if box[0] <= u0 and box[2] >= u1)
+        covered, top = 0.0, None
+        for v0, v1 in spans:
+            if top is None or v0 > top:
+                covered += v1 - v0
+                top = v1
+            elif v1 > top:
+                covered += v1 - top
+                top = v1
+        area += covered * (u1 - u0)
+    return area
+
+def edges_on_line(rings, origin, angle, tolerance=1.0):
+    """Where the edges of rings lie on a line, e.g. the rooms along a corridor.
+    :param rings:     Rings to look at.
+    :param origin:    (x, y) on the line.
+    :param angle:     Direction of the line, degrees.
+    :param tolerance: Largest distance of an edge from the line to count as on it.
+    :return:          List of (t0, t1), the stretches of the line covered, t measured from origin."""
+    dx, dy  = cos(radians(angle)), sin(radians(angle))
+    extents = []
+    for ring in rings:
+        for start, end in zip(ring, ring[1:] + ring[:1]):
+            offsets = [(point[0] - origin[0]) * -dy + (point[1] - origin[1]) * dx for point in (start, end)]
+            if max(abs(offset) for offset in offsets) > tolerance:
+                continue
+            ts = [(point[0] - origin[0]) * dx + (point[1] - origin[1]) * dy for point in (start, end)]
+            extents.append((min(ts), max(ts)))
+    return extents
+
+def grid_points(ring, count):
+    """count x count points spread evenly over the bounding box of a ring, like the UV grid of a surface."""
+    xs, ys = [x for x, y in ring], [y for x, y in ring]
+    steps  = [i / float(count - 1) for i in range(count)]
+    return [(min(xs) + u * (max(xs) - min(xs)), min(ys) + v * (max(ys) - min(ys))) for u in steps for v in steps]
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+import datetime
+import sqlite3
+
+from Snippets._quantity_store import QUANTITIES
+from Snippets._takeoff import SECTIONS
+
+# VARIABLES
+HISTORY_FILE_NAME = 'takeoff_history.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    created     TEXT NOT NULL,
+    document    TEXT NOT NULL,
+    source      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quantities (
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id),
+    category    TEXT NOT NULL,
+    type_id     INTEGER,
+    type_name   TEXT NOT NULL,
+    count       INTEGER NOT NULL,
+    {quantity_columns}
+);
+CREATE TABLE IF NOT EXISTS design_options (
+    run_id        INTEGER NOT NULL REFERENCES runs(run_id),
+    site_area     REAL,
+    floor_count   INTEGER,
+    building_area REAL,
+    floor_area    REAL
+);
+CREATE INDEX IF NOT EXISTS quantities_run      ON quantities (run_id);
+CREATE INDEX IF NOT EXISTS quantities_category ON quantities (category, type_name);
+CREATE INDEX IF NOT EXISTS quantities_type     ON quantities (type_name);
+CREATE INDEX IF NOT EXISTS design_options_run  ON design_options (run_id);
+""".format(quantity_columns=',\n    '.join('{} REAL NOT NULL'.format(name) for name in QUANTITIES))
+
+INSERT_QUANTITY = 'INSERT INTO quantities (run_id, category, type_id, type_name, count, {}) VALUES (?, ?, ?, ?, ?, {})'.format(
+    ', '.join(QUANTITIES), ', '.join('?' * len(QUANTITIES)))
+
+
+# CLASSES
+class TakeoffHistory(object):
+    """SQLite store of every takeoff run and design option.
+
+    A run is one row in 'runs', its per-type totals go to 'quantities' with
+    one executemany inside the same transaction as the run row. Indexes on
+    run id, category and type name keep trend queries fast over many runs.
+
+    e.g.
+    with TakeoffHistory(path) as history:
+        run_id = history.record_takeoff(doc.Title, 'CSV Export', takeoff)
+        rows   = history.quantity_trend('walls', 'volume')"""
+
+    def __init__(self, path):
+        """:param path: Path of the database file, created with its tables if missing."""
+        self.path       = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _add_run(self, document, source):
+        cursor = self.connection.execute('INSERT INTO runs (created, document, source) VALUES (?, ?, ?)',
+                                         (datetime.datetime.now().isoformat(), document, source))
+        return cursor.lastrowid
+
+    def record_takeoff(self, document, source, takeoff):
+        """Store the per-type totals of every section of a takeoff as one run.
+        :param document: Document title.
+        :param source:   Command that produced the run, e.g. 'CSV Export'
+        :param takeoff:  TakeoffEngine after run().
+        :return:         run_id of the new run."""
+        with self.connection:
+            run_id = self._add_run(document, source)
+            rows   = ([run_id, section, type_info.type_id.IntegerValue if type_info.type_id is not None else None,
+                       type_info.type_name, type_info.count] + [type_info[name] for name in QUANTITIES]
+                      for section in SECTIONS
+                      for type_info in takeoff.section(section))
+            self.connection.executemany(INSERT_QUANTITY, rows)
+        return run_id
+
+    def record_design_option(self, document, site_area, floor_count, building_area, floor_area):
+        """Store the performance indicators of one Volume Placement design option.
+        :return: run_id of the new run."""
+        with self.connection:
+            run_id = self._add_run(document, 'Design Option')
+            self.connection.execute('INSERT INTO design_options VALUES (?, ?, ?, ?, ?)',
+                                    (run_id, site_area, floor_count, building_area, floor_area))
+        return run_id
+
+    def quantity_trend(self, category, quantity, type_name=None):
+        """Total of one quantity per run.
+        :param category:  Takeoff section, e.g. 'walls'
+        :param quantity:  Quantity column, e.g. 'volume'
+        :param type_name: Limit to one type, all types of the category by default.
+        :return:          List of (run_id, created, total) in run order."""
+        if quantity not in QUANTITIES:
+            raise ValueError('Unknown quantity: {}'.format(quantity))
+
+        query  = ('SELECT runs.run_id, runs.created, SUM(quantities.{}) FROM quantities '
+                  'JOIN runs ON runs.run_id = quantities.run_id '
+                  'WHERE quantities.category = ?').format(quantity)
+        params = [category]
+        if type_name is not None:
+            query += ' AND quantities.type_name = ?'
+            params.append(type_name)
+        query += ' GROUP BY runs.run_id ORDER BY runs.run_id'
+        return self.connection.execute(query, params).fetchall()
+
+    def design_options(self):
+        """:return: List of (run_id, created, document, site_area, floor_count, building_area, floor_area)."""
+        return self.connection.execute(
+            'SELECT runs.run_id, runs.created, runs.document, site_area, floor_count, building_area, floor_area '
+            'FROM design_options JOIN runs ON runs.run_id = design_options.run_id ORDER BY runs.run_id').fetchall()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+import io
+import json
+
+from Autodesk.Revit.DB import BuiltInCategory
+
+# VARIABLES
+CLEANUP_BASIC           = 'basic'
+CLEANUP_SNAP_DIRECTIONS = 'snap_directions'
+CLEANUPS                = [CLEANUP_BASIC, CLEANUP_SNAP_DIRECTIONS]
+
+DEFAULT_CATEGORY = 'OST_GenericModel'
+
+# CLASSES
+class MassRule(object):
+    """How the polylines of one layer become masses."""
+
+    def __init__(self, layer, height, category=DEFAULT_CATEGORY, cleanup=CLEANUP_SNAP_DIRECTIONS):
+        """
+        :param layer:    CAD layer name, e.g. '3R'
+        :param height:   Extrusion height in mm.
+        :param category: BuiltInCategory name of the DirectShape.
+        :param cleanup:  How the footprint is cleaned before extrusion, one of CLEANUPS.
+                         'basic' drops duplicate and collinear corners and simplifies the outline,
+                         'snap_directions' also snaps almost orthogonal edges."""
+        if cleanup not in CLEANUPS:
+            raise ValueError('Layer {}: unknown cleanup "{}", use one of {}'.format(layer, cleanup, ', '.join(CLEANUPS)))
+        if not hasattr(BuiltInCategory, category):
+            raise ValueError('Layer {}: unknown category "{}"'.format(layer, category))
+
+        self.layer    = layer
+        self.height   = float(height)
+        self.category = getattr(BuiltInCategory, category)
+        self.cleanup  = cleanup
+
+
+class PlantingRule(object):
+    """Which planting type the circles of one layer become."""
+
+    def __init__(self, layer, type_name, family_name=None):
+        """
+        :param layer:       CAD layer name, e.g. 'oak tree'
+        :param type_name:   Planting type name, e.g. 'Scarlet Oak - 12.5 Meters'
+        :param family_name: Family of the type, only needed when the type name is ambiguous."""
+        self.layer       = layer
+        self.type_name   = type_name
+        self.family_name = family_name
+
+
+class LayerRules(object):
+    """Layer -> rule tables of Surround Building, loaded once from a json file.
+
+    e.g. layer_rules.json
+    {"masses":    {"3R": {"height": 10400, "category": "OST_GenericModel", "cleanup": "snap_directions"}},
+     "plantings": {"oak tree": {"type": "Scarlet Oak - 12.5 Meters"}}}"""
+
+    def __init__(self, masses=None, plantings=None):
+        self.masses    = masses or {}
+        self.plantings = plantings or {}
+
+    @classmethod
+    def load(cls, path):
+        """:return: LayerRules, ValueError for an invalid rule."""
+        with io.open(path, 'r', encoding='utf-8-sig') as json_file:
+            data = json.load(json_file)
+
+        masses = dict((layer, MassRule(layer,
+                                       rule['height'],
+                                       rule.get('category', DEFAULT_CATEGORY),
+                                       rule.get('cleanup', CLEANUP_SNAP_DIRECTIONS)))
+                      for layer, rule in data.get('masses', {}).items())
+        plantings = dict((layer, PlantingRule(layer, rule['type'], rule.get('family')))
+                         for layer, rule in data.get('plantings', {}).items())
+        return cls(masses, plantings)
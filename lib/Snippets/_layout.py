@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""Design options of Volume Placement on a plain 2D footprint model.
+
+Everything is in mm on the plane of the site pad, rooms and corridors are
+rings of (x, y) from Snippets._geometry. No Revit API is used, the tool
+only turns the chosen DesignOption into elements."""
+
+# IMPORTS
+import random
+import threading
+import time
+from collections import OrderedDict
+from itertools import groupby
+
+from Snippets._geometry import (direction_angle, distance, distance_to_polygon, edges_on_line, grid_points,
+                                move_along, offset_polygon, point_in_polygon, polygon_area, polygon_distance,
+                                rectangle, union_area)
+from Snippets._levels import GROUND_STOREY_HEIGHT, TYPICAL_STOREY_HEIGHT
+
+# Threads run in parallel on IronPython, which has no GIL. Spread over every core of the machine.
+try:
+    from System import Environment
+    WORKERS = Environment.ProcessorCount
+except ImportError:
+    import multiprocessing
+    WORKERS = multiprocessing.cpu_count()
+
+# VARIABLES
+UNIT_WIDTHS      = [4200, 4200, 4200, 4200, 4200, 9100, 9100, 9100, 12800, 12800]
+SINGLE_WIDTH     = 4200
+UNIT_DEPTH       = 8000
+CORRIDOR_WIDTH   = 2200
+CORRIDOR_LENGTH  = 100000
+ROW_START        = -40000       # First Placement starts this far before the anchor.
+SETBACK          = 3500         # Retreat distance of the buildable area from the site boundary.
+ANCHOR_CLEARANCE = 7500         # Anchors are at least this far from the buildable boundary.
+ROOM_CLEARANCE   = 1000         # Rooms are more than this far from the buildable boundary.
+TREE_CLEARANCE   = 7000         # Trees are more than this far from the site boundary.
+CORE_AREA        = 500000000    # One stair core per 500 m² of a typical floor.
+GRID_COUNT       = 11
+ROTATIONS        = range(-8, 8)
+FLOOR_COUNTS     = range(8, 15)
+COLUMN_OFFSETS   = range(-69050, 73450, 7500)
+# Largest typical floor without corridors: four rows of every unit width, one single room left out.
+MAX_ROOM_AREA    = (4 * sum(UNIT_WIDTHS) - SINGLE_WIDTH) * UNIT_DEPTH
+
+MAX_ITERATIONS   = 2000
+TIME_BUDGET      = 30.0         # Seconds.
+BATCH_SIZE       = 200          # Candidates evaluated together, the budgets are checked between batches.
+
+# Weights of the option score, every measure is between 0 and 1.
+SCORE_WEIGHTS    = OrderedDict([('floor area', 1.0), ('coverage', 0.5), ('setback', 0.25), ('connectivity', 1.0)])
+
+REJECT_FLOOR_AREA = 'floor area'
+REJECT_SETBACK    = 'setback'
+REJECT_COVERAGE   = 'coverage'
+REJECT_CORRIDOR   = 'corridor'
+
+# FUNCTIONS
+def draw_candidate(site, rng):
+    """Draw the random values of one design option.
+    :param site: DesignSite.
+    :param rng:  random.Random of the search.
+    :return:     Candidate"""
+    rotate_value = rng.choice(ROTATIONS)
+    floor_value  = rng.choice(FLOOR_COUNTS)
+    anchor       = rng.choice(site.anchors)
+    widths       = list(UNIT_WIDTHS)
+    rng.shuffle(widths)
+    single       = rng.choice([i for i in range(len(widths)) if widths[i] == SINGLE_WIDTH])
+    cross_widths = list(UNIT_WIDTHS)
+    rng.shuffle(cross_widths)
+    core_start   = rng.choice([0, 1, 2, 3, 4, 5])
+    return Candidate(rotate_value, floor_value, anchor, widths, single, cross_widths, core_start)
+
+def evaluate(site, candidate):
+    """Lay out one candidate, cheap checks first.
+    The reachable floor area is checked before any room is placed, the setback
+    and building coverage before the corridors and the floor area union.
+    Only reads site and candidate, so candidates can be evaluated side by side.
+    :return: (DesignOption, None), or (None, reason) for a rejected candidate."""
+    rotate_value, floor_value = candidate.rotate_value, candidate.floor_value
+    if floor_value * MAX_ROOM_AREA + 2 * CORRIDOR_WIDTH * CORRIDOR_LENGTH <= site.target_floor_area:
+        return None, REJECT_FLOOR_AREA
+    # Direction of the X axis of the design coordinate system, the Y axis is 90 degrees further.
+    theta = site.arch_angle + rotate_value
+
+    ### First Placement
+    # The room types along the X axis, starting ROW_START before the anchor.
+    L1 = candidate.widths
+    P5 = [move_along(candidate.anchor, theta, value) for value in _row_offsets(L1, ROW_START + L1[0] / 2.0, 1)]
+    R1 = [rectangle(value, theta, value2, UNIT_DEPTH) for value, value2 in zip(P5, L1)]
+    # One single room is left out, Third Placement starts from it.
+    k  = candidate.single
+    R3 = R1[:k] + R1[k + 1:]
+
+    ### Second Placement
+    # First Placement moved along the Y axis by the unit depth plus the corridor.
+    R4 = [[move_along(point, theta + 90, UNIT_DEPTH + CORRIDOR_WIDTH) for point in value] for value in R1]
+
+    ### Third Placement
+    # The room types against the Y axis from the left out room, on both sides of a corridor.
+    C5 = P5[k]
+    L3 = candidate.cross_widths
+    C7 = [move_along(move_along(C5, theta + 90, value), theta, -(UNIT_DEPTH + CORRIDOR_WIDTH) / 2.0)
+          for value in _row_offsets(L3, -SINGLE_WIDTH - L3[0] / 2.0, -1)]
+    R5 = [rectangle(value, theta, UNIT_DEPTH, value2) for value, value2 in zip(C7, L3)]
+    R6 = [[move_along(point, theta, UNIT_DEPTH + CORRIDOR_WIDTH) for point in value] for value in R5]
+
+    ### All Rooms & Check Position
+    # Keep the units fully inside the buildable area, more than ROOM_CLEARANCE from its boundary.
+    R10, margin = [], None
+    for value in R3 + R4 + R5 + R6:
+        if not all(point_in_polygon(point, site.buildable) for point in value):
+            continue
+        gap = polygon_distance(value, site.buildable)
+        if gap > ROOM_CLEARANCE:
+            R10.append(value)
+            margin = gap if margin is None else min(margin, gap)
+    if not R10:
+        return None, REJECT_SETBACK
+    room_area = sum(polygon_area(value) for value in R10)
+    if floor_value * room_area + 2 * CORRIDOR_WIDTH * CORRIDOR_LENGTH <= site.target_floor_area:
+        return None, REJECT_FLOOR_AREA
+    if room_area > site.max_building_area:
+        return None, REJECT_COVERAGE
+
+    ### First Corridor
+    # Along the far side of First Placement, as far as the rooms line it.
+    P10 = move_along(move_along(P5[0], theta + 90, UNIT_DEPTH / 2.0), theta, -L1[0] / 2.0)
+    U5  = _stretches(R10, P10, theta)
+    if not U5:
+        return None, REJECT_CORRIDOR
+    U6 = [move_along(P10, theta, min(t0 for t0, t1 in U5)), move_along(P10, theta, max(t1 for t0, t1 in U5))]
+    S5 = U6 + [move_along(point, theta + 90, CORRIDOR_WIDTH) for point in U6[::-1]]
+
+    ### Second Corridor
+    # Between the two sides of Third Placement, against the Y axis.
+    P13 = move_along(move_along(C5, theta + 90, UNIT_DEPTH / 2.0), theta, CORRIDOR_WIDTH / 2.0)
+    U9  = _stretches(R10, P13, theta - 90)
+    if not U9:
+        return None, REJECT_CORRIDOR
+    U10 = [P13, move_along(P13, theta - 90, max(t1 for t0, t1 in U9))]
+    S6  = U10 + [move_along(point, theta, -CORRIDOR_WIDTH) for point in U10[::-1]]
+
+    ### StairCase Position & Divide List
+    # A core for stairs every CORE_AREA of a typical floor, spread evenly over the rooms.
+    N6  = round(len(R10) / (round(room_area / float(CORE_AREA)) + 1))
+    N7  = [i for i in range(candidate.core_start, len(R10), max(int(N6), 1))]
+    R11 = [R10[value] for value in N7]
+    R12 = [element for element in R10 if element not in R11]
+    # The rooms grouped by type (their perimeter), after the cores.
+    R14 = [list(group) for key, group in groupby(sorted(R12, key=_perimeter), key=_perimeter)]
+
+    option = DesignOption(rotate_value, floor_value, theta, C7[0], R11, sum(R14, []), [S5, S6], margin)
+    if option.building_area > site.max_building_area:
+        return None, REJECT_COVERAGE
+    option.accepted = round(option.floor_area / 1000000.0, 2) > site.target_floor_area / 1000000.0
+    option.score    = option.measure(site)
+    return option, None
+
+def evaluate_candidates(site, candidates, workers=WORKERS):
+    """evaluate() of many candidates on a pool of worker threads.
+    :param workers: Number of threads, 1 evaluates on the calling thread.
+    :return:        List of (DesignOption, reason) in the order of the candidates."""
+    results = [None] * len(candidates)
+    errors  = []
+    workers = max(min(workers, len(candidates)), 1)
+
+    def work(first):
+        try:
+            for i in range(first, len(candidates), workers):
+                results[i] = evaluate(site, candidates[i])
+        except Exception as error:
+            errors.append(error)
+
+    if workers == 1:
+        work(0)
+    else:
+        threads = [threading.Thread(target=work, args=(first,)) for first in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+def _row_offsets(widths, first, sign):
+    """Centres of rooms of these widths side by side, the first one at first, going in the direction of sign."""
+    offsets = [first]
+    for previous, width in zip(widths, widths[1:]):
+        offsets.append(offsets[-1] + sign * (previous + width) / 2.0)
+    return offsets
+
+def _stretches(rooms, origin, angle):
+    """Where the room edges lie on a corridor line of CORRIDOR_LENGTH from origin."""
+    return [(max(t0, 0), min(t1, CORRIDOR_LENGTH)) for t0, t1 in edges_on_line(rooms, origin, angle)
+            if t1 > 0 and t0 < CORRIDOR_LENGTH]
+
+def _perimeter(ring):
+    return round(sum(distance(ring[i - 1], ring[i]) for i in range(len(ring))))
+
+
+# CLASSES
+class Candidate(object):
+    """The random values one design option is laid out from."""
+    __slots__ = ('rotate_value', 'floor_value', 'anchor', 'widths', 'single', 'cross_widths', 'core_start')
+
+    def __init__(self, rotate_value, floor_value, anchor, widths, single, cross_widths, core_start):
+        """
+        :param rotate_value: Rotation from the arch line, degrees.
+        :param floor_value:  Number of floors.
+        :param anchor:       (x, y) the First Placement is laid out around.
+        :param widths:       Room widths of First Placement in order.
+        :param single:       Position of the single room in widths that Third Placement starts from.
+        :param cross_widths: Room widths of Third Placement in order.
+        :param core_start:   Position of the first stair core among the rooms."""
+        self.rotate_value = rotate_value
+        self.floor_value  = floor_value
+        self.anchor       = anchor
+        self.widths       = widths
+        self.single       = single
+        self.cross_widths = cross_widths
+        self.core_start   = core_start
+
+
+class DesignSite(object):
+    """The site pad and the targets every option of a search is measured against."""
+
+    def __init__(self, ring, arch_angle, site_area, building_ratio, floor_area_ratio):
+        """
+        :param ring:             Top face outline of the site pad, (x, y) in mm.
+        :param arch_angle:       Direction of the arch line, degrees.
+        :param site_area:        Site area in m².
+        :param building_ratio:   Largest building coverage, % of the site area.
+        :param floor_area_ratio: Floor area to exceed, % of the site area."""
+        self.ring       = ring
+        self.arch_angle = arch_angle
+        self.site_area  = site_area
+        # Buildable Boundary : the site retreated by the setback.
+        self.buildable  = offset_polygon(ring, -SETBACK)
+        # A grid on the design face, kept on the face and ANCHOR_CLEARANCE from the buildable boundary.
+        self.anchors    = [point for point in grid_points(ring, GRID_COUNT)
+                           if point_in_polygon(point, ring) and distance_to_polygon(point, self.buildable) >= ANCHOR_CLEARANCE]
+        self.max_building_area = site_area * 1000000.0 * float(building_ratio) / 100
+        self.target_floor_area = site_area * 1000000.0 * float(floor_area_ratio) / 100
+
+    @classmethod
+    def from_arch_points(cls, ring, start, end, site_area, building_ratio, floor_area_ratio):
+        """:param start: (x, y) of the arch line start, end likewise."""
+        return cls(ring, direction_angle(start, end), site_area, building_ratio, floor_area_ratio)
+
+
+class DesignOption(object):
+    """One design option: the typical floor, the corridors and the floor count."""
+
+    def __init__(self, rotate_value, floor_value, theta, origin, cores, rooms, corridors, setback_margin=None):
+        """
+        :param theta:          Direction of the X axis of the design, degrees.
+        :param origin:         Centre of the first room of Third Placement, the column grid is laid out from it.
+        :param cores:          Rings of the stair cores.
+        :param rooms:          Rings of the other units, grouped by type.
+        :param corridors:      Rings of the two corridors.
+        :param setback_margin: Shortest distance of a unit to the buildable boundary."""
+        self.rotate_value   = rotate_value
+        self.floor_value    = floor_value
+        self.theta          = theta
+        self.origin         = origin
+        self.cores          = cores
+        self.rooms          = rooms
+        self.corridors      = corridors
+        self.setback_margin = setback_margin
+        self.accepted       = False
+        self.score          = 0.0
+        self.measures       = OrderedDict()
+        # Every floor of units plus the corridors once, the way the options have always been measured.
+        self.building_area = union_area(self.typical_floor + corridors, theta)
+        self.floor_area    = self.building_area + (floor_value - 1) * union_area(self.typical_floor, theta)
+
+    @property
+    def typical_floor(self):
+        """Cores first, then the rooms."""
+        return self.cores + self.rooms
+
+    @property
+    def floor_elevations(self):
+        """Elevation of every floor in mm, e.g. [0, 4000, 7400, ...]."""
+        return [0] + [GROUND_STOREY_HEIGHT + i * TYPICAL_STOREY_HEIGHT for i in range(self.floor_value - 1)]
+
+    @property
+    def floor_heights(self):
+        """Height of every floor in mm, e.g. [4000, 3400, ...]."""
+        return [GROUND_STOREY_HEIGHT] + [TYPICAL_STOREY_HEIGHT] * (self.floor_value - 1)
+
+    def measure(self, site):
+        """Score the option, the weighted sum of SCORE_WEIGHTS.
+        floor area:   share of the floor area target reached.
+        coverage:     share of the allowed building coverage used.
+        setback:      distance of the closest unit to the buildable boundary, relative to the setback.
+        connectivity: share of the units with a side on a corridor.
+        :return: Score, the measures are kept in self.measures."""
+        units     = self.typical_floor
+        connected = [unit for unit in units if any(polygon_distance(unit, corridor) < 1 for corridor in self.corridors)]
+        margin    = self.setback_margin if self.setback_margin is not None else 0.0
+        self.measures = OrderedDict([
+            ('floor area',   min(self.floor_area / site.target_floor_area, 1.0) if site.target_floor_area else 1.0),
+            ('coverage',     min(self.building_area / site.max_building_area, 1.0) if site.max_building_area else 0.0),
+            ('setback',      min(margin / float(SETBACK), 1.0)),
+            ('connectivity', len(connected) / float(len(units)) if units else 0.0)])
+        return sum(SCORE_WEIGHTS[name] * value for name, value in self.measures.items())
+
+    def columns(self):
+        """Column points of a grid laid out from origin that lie on the typical floor or a corridor."""
+        footprint = self.typical_floor + self.corridors
+        points    = [move_along(move_along(self.origin, self.theta, value1), self.theta + 90, value2)
+                     for value2 in COLUMN_OFFSETS for value1 in COLUMN_OFFSETS]
+        return [point for point in points if any(point_in_polygon(point, ring) for ring in footprint)]
+
+    def trees(self, site):
+        """Tree points of a grid over the site, off the building and more than TREE_CLEARANCE from the site boundary."""
+        footprint = self.typical_floor + self.corridors
+        return [point for point in grid_points(site.ring, GRID_COUNT)
+                if point_in_polygon(point, site.ring)
+                and not any(point_in_polygon(point, ring) for ring in footprint)
+                and distance_to_polygon(point, site.ring) > TREE_CLEARANCE]
+
+
+class LayoutSearch(object):
+    """Seeded random search for a design option within an iteration and time budget.
+
+    Candidates are drawn in batches of BATCH_SIZE from one random.Random and
+    evaluated on WORKERS threads. The search stops after the first batch with
+    an option over the floor area target and returns the best scored of those.
+    When the budget runs out first, the best scored option is returned instead
+    (its accepted flag is False), None when every candidate was rejected.
+    The same seed gives the same options, whatever the number of workers.
+
+    e.g.
+    search = LayoutSearch(site, seed=42)
+    option = search.run()
+    print(search)"""
+
+    def __init__(self, site, seed=None, max_iterations=MAX_ITERATIONS, time_budget=TIME_BUDGET,
+                 batch_size=BATCH_SIZE, workers=WORKERS):
+        """
+        :param site:           DesignSite.
+        :param seed:           Seed of the random draws, a random seed by default.
+        :param max_iterations: Largest number of candidates.
+        :param time_budget:    Longest search time in seconds, checked between batches.
+        :param batch_size:     Candidates evaluated together.
+        :param workers:        Threads evaluating a batch."""
+        self.site           = site
+        self.seed           = seed if seed is not None else random.randrange(2 ** 31)
+        self.max_iterations = max_iterations
+        self.time_budget    = time_budget
+        self.batch_size     = batch_size
+        self.workers        = workers
+        self.iterations     = 0
+        self.elapsed        = 0.0
+        self.rejected       = OrderedDict()
+        self.best           = None
+
+    def run(self):
+        """:return: DesignOption, None when no option passed the checks."""
+        rng   = random.Random(self.seed)
+        start = time.time()
+        if self.site.anchors:
+            while self.iterations < self.max_iterations and time.time() - start < self.time_budget:
+                count      = min(self.batch_size, self.max_iterations - self.iterations)
+                candidates = [draw_candidate(self.site, rng) for _ in range(count)]
+                self.iterations += count
+                for option, reason in evaluate_candidates(self.site, candidates, self.workers):
+                    if option is None:
+                        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+                    elif self.best is None or (option.accepted, option.score) > (self.best.accepted, self.best.score):
+                        self.best = option
+                if self.best is not None and self.best.accepted:
+                    break
+        self.elapsed = time.time() - start
+        return self.best
+
+    def __str__(self):
+        """e.g. '200 options in 1.3 s (seed 42), rejected: floor area 80, corridor 30'"""
+        text = '{} options in {} s (seed {})'.format(self.iterations, round(self.elapsed, 1), self.seed)
+        if self.rejected:
+            text += ', rejected: ' + ', '.join('{} {}'.format(reason, count) for reason, count in self.rejected.items())
+        return text
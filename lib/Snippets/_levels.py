@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+import re
+
+from Autodesk.Revit.DB import BuiltInCategory, FilteredElementCollector, Level
+
+# VARIABLES
+GROUND_STOREY_HEIGHT  = 4000        # mm, the first storey of the design masses.
+TYPICAL_STOREY_HEIGHT = 3400        # mm, every storey above it.
+LEVEL_COUNT           = 14
+LEVEL_NAME            = 'Level {}'
+ELEVATION_TOLERANCE   = 1 / 304.8   # ft, levels closer than 1 mm are the same level.
+
+# FUNCTIONS
+def parse_storey_heights(text):
+    """Read a storey-height schedule typed by the user.
+    Heights in mm are separated by commas or spaces, 'height*count' repeats a height,
+    e.g. '4200, 3400*12' or '4500 3600 3600'.
+    :return: List of storey heights in mm.
+    :raise:  ValueError for anything else."""
+    heights = []
+    for token in re.split(r'[,;\s]+', text.strip()):
+        if not token:
+            continue
+        height, _, count = token.partition('*')
+        height, count = float(height), int(count) if count else 1
+        if height <= 0 or count < 1:
+            raise ValueError('Storey heights must be positive: {}'.format(token))
+        heights.extend([height] * count)
+    if not heights:
+        raise ValueError('No storey heights given.')
+    return heights
+
+def storey_elevations(base, heights):
+    """Elevation of every level of a stack, in the unit of base and heights.
+    :return: List, base first, one more entry than heights."""
+    elevations = [base]
+    for height in heights:
+        elevations.append(elevations[-1] + height)
+    return elevations
+
+
+# CLASSES
+class LevelStack(object):
+    """Levels of a document, collected once, that stacks of new levels are added to.
+
+    A level already at the elevation of a storey is reused instead of creating
+    a duplicate on top of it. New levels are named 'Level n' after
+    their place in the stack, unless another level already has that name.
+
+    e.g.
+    stack = LevelStack(doc)
+    with Transaction(doc, 'Levels') as t:
+        t.Start()
+        levels = stack.create(base, [4000, 3400, 3400])
+        t.Commit()"""
+
+    def __init__(self, doc):
+        self.doc     = doc
+        self.levels  = sorted(FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Levels)
+                              .WhereElementIsNotElementType().ToElements(), key=lambda level: level.Elevation)
+        self.names   = set(level.Name for level in self.levels)
+        self.created = 0
+        self.reused  = 0
+
+    def by_name(self, name):
+        """:return: Level with that name, None when there is none."""
+        for level in self.levels:
+            if level.Name == name:
+                return level
+        return None
+
+    def at(self, elevation, tolerance=ELEVATION_TOLERANCE):
+        """:param elevation: Elevation in feet.
+        :return:          Level at that elevation, None when there is none."""
+        for level in self.levels:
+            if abs(level.Elevation - elevation) <= tolerance:
+                return level
+        return None
+
+    def create(self, base, heights):
+        """Make sure there is a level at the base and on top of every storey, must be called inside a transaction.
+        :param base:    Elevation of the first level in feet.
+        :param heights: Storey heights in mm, e.g. parse_storey_heights().
+        :return:        List of Levels, bottom first."""
+        stack = []
+        for number, elevation in enumerate(storey_elevations(base, [height / 304.8 for height in heights]), 1):
+            level = self.at(elevation)
+            if level is not None:
+                self.reused += 1
+            else:
+                level = Level.Create(self.doc, elevation)
+                name  = LEVEL_NAME.format(number)
+                # A name held by a level at another elevation is left to Revit's default.
+                if name not in self.names:
+                    level.Name = name
+                    self.names.add(name)
+                self.levels.append(level)
+                self.created += 1
+            stack.append(level)
+        return stack
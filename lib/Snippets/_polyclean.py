@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from math import atan2, cos, degrees, radians, sin, sqrt
+
+from Snippets._geometry import distance_to_segment, polygon_area, segments_cross
+from Snippets._geometry import distance as point_distance
+
+# VARIABLES
+# Defaults are in feet, the unit of Revit coordinates.
+MIN_EDGE_LENGTH   = 1 / 256.0       # Revit's short curve tolerance, shorter edges cannot become Lines.
+SIMPLIFY_DISTANCE = 5 / 304.8       # Corners closer than 5 mm to the simplified outline are dropped.
+COLLINEAR_ANGLE   = 0.1             # Degrees, straighter corners are dropped.
+SNAP_ANGLE        = 1.0             # Degrees, edges this close to the main axes are made orthogonal.
+
+# FUNCTIONS
+def remove_duplicates(points, tolerance=MIN_EDGE_LENGTH):
+    """Drop corners closer than tolerance to the previous one, including a repeated first corner.
+    :return: (ring of (x, y), number of corners dropped)"""
+    ring = []
+    for x, y in points:
+        if not ring or point_distance(ring[-1], (x, y)) >= tolerance:
+            ring.append((x, y))
+    while len(ring) > 1 and point_distance(ring[-1], ring[0]) < tolerance:
+        ring.pop()
+    return ring, len(points) - len(ring)
+
+def remove_collinear(points, angle=COLLINEAR_ANGLE):
+    """Drop corners where the outline goes on straight or doubles back on itself.
+    :return: (ring of (x, y), number of corners dropped)"""
+    ring, limit = list(points), sin(radians(angle))
+    changed = True
+    while changed and len(ring) > 3:
+        changed = False
+        for i in range(len(ring)):
+            (ax, ay), (px, py), (bx, by) = ring[i - 1], ring[i], ring[(i + 1) % len(ring)]
+            e1x, e1y, e2x, e2y = px - ax, py - ay, bx - px, by - py
+            lengths = sqrt(e1x * e1x + e1y * e1y) * sqrt(e2x * e2x + e2y * e2y)
+            if lengths == 0 or abs(e1x * e2y - e1y * e2x) / lengths < limit:
+                del ring[i]
+                changed = True
+                break
+    return ring, len(points) - len(ring)
+
+def simplify(points, distance=SIMPLIFY_DISTANCE):
+    """Douglas-Peucker of a closed ring, split at the corner farthest from the first one.
+    :return: (ring of (x, y), number of corners dropped)"""
+    count = len(points)
+    if count <= 3:
+        return list(points), 0
+
+    far  = max(range(count), key=lambda i: point_distance(points[0], points[i]))
+    keep = set([0, far])
+    stack = [(0, far), (far, count)]
+    while stack:
+        first, last = stack.pop()
+        start, end = points[first], points[last % count]
+        worst, worst_distance = None, distance
+        for i in range(first + 1, last):
+            offset = distance_to_segment(points[i], start, end)
+            if offset > worst_distance:
+                worst, worst_distance = i, offset
+        if worst is not None:
+            keep.add(worst)
+            stack.extend([(first, worst), (worst, last)])
+
+    ring = [points[i] for i in sorted(keep)]
+    return ring, count - len(ring)
+
+def snap_orthogonal(points, angle=SNAP_ANGLE):
+    """Turn edges within angle of the outline's main axes (those of its longest edge) onto
+    them and rebuild every corner as the crossing of its two edges. Neighbouring edges
+    that end up parallel become one edge at their length weighted offset.
+    :return: (ring of (x, y), number of edges snapped)"""
+    count = len(points)
+    edges = [(points[i], points[(i + 1) % count]) for i in range(count)]
+    start, end = max(edges, key=lambda edge: point_distance(*edge))
+    main_axis  = degrees(atan2(end[1] - start[1], end[0] - start[0])) % 90
+
+    # Every edge as a line: its middle, its direction and its length.
+    lines, snapped = [], 0
+    for (x0, y0), (x1, y1) in edges:
+        direction = degrees(atan2(y1 - y0, x1 - x0))
+        deviation = (direction - main_axis) % 90
+        deviation = deviation - 90 if deviation > 45 else deviation
+        if 1e-9 < abs(deviation) <= angle:
+            direction -= deviation
+            snapped += 1
+        lines.append(((x0 + x1) / 2.0, (y0 + y1) / 2.0, cos(radians(direction)), sin(radians(direction)),
+                      point_distance((x0, y0), (x1, y1))))
+
+    if not snapped:
+        return list(points), 0
+
+    merged = []
+    for line in lines:
+        if merged and _parallel(merged[-1], line):
+            merged[-1] = _merge(merged[-1], line)
+        else:
+            merged.append(line)
+    if len(merged) > 1 and _parallel(merged[-1], merged[0]):
+        merged[0] = _merge(merged.pop(), merged[0])
+    if len(merged) < 3:
+        return list(points), 0
+
+    ring = [_intersect(merged[i - 1], merged[i]) for i in range(len(merged))]
+    if None in ring:
+        return list(points), 0
+    return ring, snapped
+
+def is_simple(points):
+    """True when no two edges of the ring cross, except neighbours at their shared corner."""
+    count = len(points)
+    edges = [(points[i], points[(i + 1) % count]) for i in range(count)]
+    for i in range(count):
+        for j in range(i + 2, count):
+            if i == 0 and j == count - 1:
+                continue
+            if segments_cross(edges[i], edges[j]):
+                return False
+    return True
+
+def clean_footprint(points, snap=True, tolerance=MIN_EDGE_LENGTH, distance=SIMPLIFY_DISTANCE,
+                    collinear_angle=COLLINEAR_ANGLE, snap_angle=SNAP_ANGLE):
+    """Clean a footprint outline before a CurveLoop is built from it.
+    Duplicate, collinear and near-collinear corners are dropped, the outline is
+    simplified with Douglas-Peucker, almost orthogonal edges are snapped (if snap)
+    and the ring is returned open and counterclockwise. create_profile closes it.
+    :param points: Corners (x, y), open or closed (last corner equal to the first).
+    :param snap:   Snap almost orthogonal edges.
+    :return:       (ring of (x, y), CleanupReport). report.problem is set when no valid outline is left."""
+    report = CleanupReport()
+    ring   = [(x, y) for x, y in points]
+    if len(ring) > 2 and point_distance(ring[0], ring[-1]) < tolerance:
+        ring.pop()                      # Closing corner of a closed outline.
+    else:
+        report.closed = len(ring) > 2
+
+    ring, report.duplicates = remove_duplicates(ring, tolerance)
+    ring, report.collinear  = remove_collinear(ring, collinear_angle)
+    ring, report.simplified = simplify(ring, distance)
+    if snap and len(ring) > 2:
+        corners = len(ring)
+        ring, report.snapped = snap_orthogonal(ring, snap_angle)
+        report.collinear += corners - len(ring)
+        ring, duplicates = remove_duplicates(ring, tolerance)
+        ring, collinear  = remove_collinear(ring, collinear_angle)
+        report.duplicates += duplicates
+        report.collinear  += collinear
+
+    if len(ring) < 3:
+        report.problem = 'fewer than 3 corners left'
+    elif abs(polygon_area(ring)) < tolerance * tolerance:
+        report.problem = 'outline has no area'
+    elif not is_simple(ring):
+        report.problem = 'outline crosses itself'
+    elif polygon_area(ring) < 0:
+        ring.reverse()
+        report.reversed = True
+    return ring, report
+
+def _parallel(line0, line1):
+    """Lines (x, y, dx, dy, length) running the same way."""
+    return abs(line0[2] * line1[3] - line0[3] * line1[2]) < 1e-9 and line0[2] * line1[2] + line0[3] * line1[3] > 0
+
+def _merge(line0, line1):
+    """One line for two parallel lines, placed at their length weighted middle."""
+    length = float(line0[4] + line1[4])
+    return ((line0[0] * line0[4] + line1[0] * line1[4]) / length,
+            (line0[1] * line0[4] + line1[1] * line1[4]) / length,
+            line0[2], line0[3], length)
+
+def _intersect(line0, line1):
+    """Crossing of two lines (x, y, dx, dy, length), None when they are parallel."""
+    x0, y0, dx0, dy0 = line0[:4]
+    x1, y1, dx1, dy1 = line1[:4]
+    cross = dx0 * dy1 - dy0 * dx1
+    if abs(cross) < 1e-9:
+        return None
+    t = ((x1 - x0) * dy1 - (y1 - y0) * dx1) / cross
+    return (x0 + t * dx0, y0 + t * dy0)
+
+# CLASSES
+class CleanupReport(object):
+    """What clean_footprint() changed on one outline."""
+
+    def __init__(self):
+        self.closed     = False     # The outline was open and has been closed.
+        self.duplicates = 0
+        self.collinear  = 0
+        self.simplified = 0
+        self.snapped    = 0
+        self.reversed   = False     # Clockwise outline turned counterclockwise.
+        self.problem    = None      # Why no valid outline is left, None when there is one.
+
+    @property
+    def changed(self):
+        return bool(self.closed or self.duplicates or self.collinear or self.simplified or self.snapped or self.reversed)
+
+    def __str__(self):
+        """e.g. '2 duplicate corners, 1 edge snapped, reversed'"""
+        fixes = ['{} {}'.format(count, text) for count, text in [(self.duplicates, 'duplicate corners'),
+                                                                 (self.collinear,  'collinear corners'),
+                                                                 (self.simplified, 'corners simplified'),
+                                                                 (self.snapped,    'edges snapped')] if count]
+        if self.closed:
+            fixes.append('closed')
+        if self.reversed:
+            fixes.append('reversed')
+        if self.problem:
+            fixes.append(self.problem)
+        return ', '.join(fixes) or 'clean'
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from array import array
+from operator import mul
+
+# NumPy is only there on the CPython engine, IronPython falls back to the array loops.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# VARIABLES
+QUANTITIES = ['volume', 'length', 'height', 'risers', 'floor_area', 'ceiling_area', 'wall_area']
+
+
+# FUNCTIONS
+def multiply(values, factors):
+    """Element-wise product of two equally long number sequences.
+    e.g. multiply(quantities, unit_costs) -> cost of every group"""
+    return array('d', map(mul, values, factors))
+
+def _group_sum(groups, values, group_count):
+    if numpy is not None and len(groups):
+        sums = numpy.bincount(numpy.frombuffer(groups, dtype=numpy.intc),
+                              weights=numpy.frombuffer(values, dtype=numpy.float64),
+                              minlength=group_count)
+        return array('d', sums.tolist())
+
+    sums = [0.0] * group_count
+    for group, value in zip(groups, values):
+        sums[group] += value
+    return array('d', sums)
+
+def _group_count(groups, group_count):
+    if numpy is not None and len(groups):
+        counts = numpy.bincount(numpy.frombuffer(groups, dtype=numpy.intc), minlength=group_count)
+        return array('i', counts.tolist())
+
+    counts = [0] * group_count
+    for group in groups:
+        counts[group] += 1
+    return array('i', counts)
+
+
+# CLASSES
+class QuantityStore(object):
+    """Struct-of-arrays store of the quantities of every extracted element.
+
+    One row per element: its group (type) index in self.rows_group and one
+    float per quantity in self.columns. Group metadata (section code, key,
+    name, type id) is stored once per group. Sums and counts per group are
+    computed column by column in aggregate()."""
+
+    def __init__(self, quantities=QUANTITIES):
+        self.quantities     = list(quantities)
+        self.group_sections = array('i')
+        self.group_keys     = []
+        self.group_names    = []
+        self.group_type_ids = []
+        self.rows_group     = array('i')
+        self.columns        = [array('d') for _ in self.quantities]
+        self._group_index   = {}
+
+    def __len__(self):
+        return len(self.rows_group)
+
+    @property
+    def group_count(self):
+        return len(self.group_keys)
+
+    def get_group(self, section_code, key):
+        """:return: Index of an existing group, None if unknown."""
+        return self._group_index.get((section_code, key))
+
+    def add_group(self, section_code, key, name, type_id=None):
+        """Register a new group (type or room name) and return its index."""
+        group = len(self.group_keys)
+        self._group_index[(section_code, key)] = group
+        self.group_sections.append(section_code)
+        self.group_keys.append(key)
+        self.group_names.append(name)
+        self.group_type_ids.append(type_id)
+        return group
+
+    def append(self, group, quantities):
+        """Add one element row.
+        :param group:      Group index from add_group/get_group.
+        :param quantities: dict, quantity name -> value. Missing quantities are 0.0."""
+        self.rows_group.append(group)
+        get = quantities.get
+        for name, column in zip(self.quantities, self.columns):
+            column.append(get(name, 0.0))
+
+    def aggregate(self):
+        """Group-by over all rows.
+        :return: (counts, sums) where counts is array('i') per group and
+                 sums is dict, quantity name -> array('d') per group."""
+        group_count = self.group_count
+        counts = _group_count(self.rows_group, group_count)
+        sums   = dict((name, _group_sum(self.rows_group, column, group_count))
+                      for name, column in zip(self.quantities, self.columns))
+        return counts, sums
+
+    def groups_of(self, section_code):
+        """:return: Group indices of one section, in first-seen order."""
+        return [group for group, code in enumerate(self.group_sections) if code == section_code]
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+import csv
+import io
+
+# CLASSES
+class CsvReportWriter(object):
+    """Stream a sectioned report straight into one open csv file.
+    Every row goes to the file handle as soon as it is written, nothing is
+    kept in memory and the file is never read back.
+
+    e.g.
+    with CsvReportWriter(path) as report:
+        report.write_section('Column Type Name')
+        report.write_row([1, 'C 50x50', 'Volume (m³)', 12.5])"""
+
+    def __init__(self, path, encoding='utf-8-sig', section_width=5):
+        """
+        :param path:          Path of the csv file, overwritten if it exists.
+        :param encoding:      File encoding, utf-8-sig keeps Excel happy with CJK labels.
+        :param section_width: Number of columns of a section title row."""
+        self.path          = path
+        self.encoding      = encoding
+        self.section_width = section_width
+        self.rows_written  = 0
+        self._file         = None
+        self._writer       = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        self._file   = io.open(self.path, 'w', newline='', encoding=self.encoding)
+        self._writer = csv.writer(self._file)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file   = None
+            self._writer = None
+
+    def write_section(self, title):
+        """Write the title row that starts a new section."""
+        self.write_row([title] + [''] * (self.section_width - 1))
+
+    def write_row(self, row):
+        self._writer.writerow(row)
+        self.rows_written += 1
+
+    def write_rows(self, rows):
+        """:param rows: Any iterable of rows, generators are consumed lazily."""
+        for row in rows:
+            self.write_row(row)
@@ -2,9 +2,23 @@
 
 # IMPORTS
 from Autodesk.Revit.DB import *
+from pyrevit import forms, revit
+
+from Snippets._takeoff import collect_takeoff_elements
+from Snippets._cad import extract_by_layer
+from Snippets._dxf import read_dxf, to_revit_buckets
 
 # VARIABLES
 uidoc = __revit__.ActiveUIDocument
+
+SCOPE_SELECTION   = 'Picked Elements'
+SCOPE_WHOLE_MODEL = 'Whole Model'
+SCOPE_ACTIVE_VIEW = 'Active View'
+SCOPE_BY_LEVEL    = 'By Level'
+
+CAD_LINKED_DWG = 'Linked DWG'
+CAD_DXF_FILE   = 'DXF File'
+
 # FUNCTIONS
 
 def get_selected_elements(uidoc):
@@ -13,4 +27,58 @@ def get_selected_elements(uidoc):
     for elem_id in uidoc.Selection.GetElementIds():
         elem = uidoc.Document.GetElement(elem_id)
         selected_elements.append(elem)
-    return selected_elements
\ No newline at end of file
+    return selected_elements
+
+def get_takeoff_elements(doc):
+    """Ask for the takeoff scope and return the elements in it.
+    'Picked Elements' keeps the manual selection, every other scope is
+    gathered by one filtered collector.
+    :param doc: Revit Document.
+    :return:    List of Elements, None if the user cancelled."""
+    scope = forms.CommandSwitchWindow.show([SCOPE_SELECTION, SCOPE_WHOLE_MODEL, SCOPE_ACTIVE_VIEW, SCOPE_BY_LEVEL],
+                                           message='Select takeoff scope:')
+    if not scope:
+        return None
+
+    if scope == SCOPE_SELECTION:
+        with forms.WarningBar(title='Pick an Element:'):
+            return revit.pick_elements()
+
+    if scope == SCOPE_ACTIVE_VIEW:
+        return collect_takeoff_elements(doc, view_id=doc.ActiveView.Id)
+
+    if scope == SCOPE_BY_LEVEL:
+        level = forms.select_levels(doc=doc, title='Select Level', multiple=False)
+        if not level:
+            return None
+        return collect_takeoff_elements(doc, level_id=level.Id)
+
+    return collect_takeoff_elements(doc)
+
+def get_cad_layers(doc, layers=None):
+    """Ask for the CAD source and return its geometry grouped by layer.
+    'Linked DWG' walks a picked ImportInstance, 'DXF File' streams a DXF
+    from disk without linking it. Both give Revit PolyLines and Arcs.
+    :param doc:    Revit Document.
+    :param layers: Only keep these layers, all layers by default.
+    :return:       OrderedDict, layer name -> list of geometry objects, None if the user cancelled."""
+    source = forms.CommandSwitchWindow.show([CAD_LINKED_DWG, CAD_DXF_FILE], message='Select CAD source:')
+    if not source:
+        return None
+
+    if source == CAD_DXF_FILE:
+        path = forms.pick_file(file_ext='dxf', title='Pick DXF File:')
+        if not path:
+            return None
+        try:
+            buckets = read_dxf(path, layers)
+        except (ValueError, IOError, OSError) as error:
+            # Binary, malformed or unreadable files stop the tool with the reason instead of a traceback.
+            forms.alert('Could not read {}:\n{}'.format(path, error), exitscript=True)
+        return to_revit_buckets(buckets)
+
+    with forms.WarningBar(title='Pick CAD File:'):
+        cad = revit.pick_element()
+    if not cad:
+        return None
+    return extract_by_layer(doc, cad, layers)
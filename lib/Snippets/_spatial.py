@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from math import floor
+
+# FUNCTIONS
+def expand_box(box, margin):
+    """:param box: (xmin, ymin, xmax, ymax)
+    :return:    The box grown by margin on every side."""
+    xmin, ymin, xmax, ymax = box
+    return (xmin - margin, ymin - margin, xmax + margin, ymax + margin)
+
+def boxes_overlap(box1, box2):
+    return box1[0] <= box2[2] and box2[0] <= box1[2] and box1[1] <= box2[3] and box2[1] <= box1[3]
+
+
+# CLASSES
+class GridIndex(object):
+    """Uniform grid over the 2D bounding boxes of items, built once per run.
+
+    Every item is registered in each grid cell its box covers. A query only
+    visits the cells under the query box and tests the boxes found there,
+    instead of every item.
+
+    e.g.
+    index = GridIndex.from_items(faces, [face_box(face) for face in faces])
+    near  = index.nearest(footprint_box)"""
+
+    def __init__(self, cell_size):
+        """:param cell_size: Edge length of a grid cell, in the units of the boxes."""
+        self.cell_size = float(cell_size)
+        self.items     = []
+        self.boxes     = []
+        self._cells    = {}
+        self._extent   = None
+
+    def __len__(self):
+        return len(self.items)
+
+    @classmethod
+    def from_items(cls, items, boxes, cell_size=None):
+        """Build an index, the cell size defaults to the mean box edge length.
+        :param items: Any objects, e.g. footprint rings.
+        :param boxes: (xmin, ymin, xmax, ymax) of every item.
+        :return:      GridIndex"""
+        boxes = list(boxes)
+        if cell_size is None:
+            edges     = [max(box[2] - box[0], box[3] - box[1]) for box in boxes]
+            cell_size = sum(edges) / len(edges) if edges else 0.0
+        index = cls(cell_size or 1.0)
+        for item, box in zip(items, boxes):
+            index.insert(item, box)
+        return index
+
+    def _cell_range(self, box):
+        size = self.cell_size
+        return (int(floor(box[0] / size)), int(floor(box[1] / size)),
+                int(floor(box[2] / size)), int(floor(box[3] / size)))
+
+    def insert(self, item, box):
+        number = len(self.items)
+        self.items.append(item)
+        self.boxes.append(box)
+
+        i0, j0, i1, j1 = self._cell_range(box)
+        cells = self._cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cells.setdefault((i, j), []).append(number)
+
+        extent = self._extent
+        self._extent = box if extent is None else (min(extent[0], box[0]), min(extent[1], box[1]),
+                                                   max(extent[2], box[2]), max(extent[3], box[3]))
+
+    def cell_of(self, x, y):
+        """:return: Key of the grid cell a point falls in, for cell_items()."""
+        size = self.cell_size
+        return int(floor(x / size)), int(floor(y / size))
+
+    def cell_items(self, cell):
+        """:return: Items registered in one grid cell, in insertion order. Every item whose
+                    box covers a point of the cell is among them."""
+        return [self.items[number] for number in self._cells.get(cell, ())]
+
+    def query(self, box):
+        """:return: Items whose box overlaps the query box, in insertion order."""
+        extent = self._extent
+        if extent is None or not boxes_overlap(box, extent):
+            return []
+
+        # Cells outside the extent are empty, clip the query to it.
+        i0, j0, i1, j1 = self._cell_range((max(box[0], extent[0]), max(box[1], extent[1]),
+                                           min(box[2], extent[2]), min(box[3], extent[3])))
+        cells   = self._cells
+        numbers = set()
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                numbers.update(cells.get((i, j), ()))
+
+        boxes = self.boxes
+        return [self.items[number] for number in sorted(numbers) if boxes_overlap(boxes[number], box)]
+
+    def nearest(self, box):
+        """Items overlapping the query box. When there are none (e.g. a tree just
+        outside the terrain), the box grows one cell at a time until it finds some.
+        :return: List of items, empty only for an empty index."""
+        extent = self._extent
+        if extent is None:
+            return []
+
+        # Skip straight to the extent when the box lies outside of it.
+        gap   = max(extent[0] - box[2], box[0] - extent[2], extent[1] - box[3], box[1] - extent[3], 0.0)
+        box   = expand_box(box, gap)
+        found = self.query(box)
+        while not found:
+            box   = expand_box(box, self.cell_size)
+            found = self.query(box)
+        return found
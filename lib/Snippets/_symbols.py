@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from Autodesk.Revit.DB import BuiltInParameter, FamilySymbol, FilteredElementCollector
+
+# CLASSES
+class FamilySymbolRegistry(object):
+    """Every FamilySymbol of a document, collected once and indexed by name.
+
+    One collector runs when the registry is created, lookups are dictionary
+    reads afterwards. activate() activates a symbol that is not active yet and
+    is a no-op for one that is. Whether it is active is asked every time,
+    a rolled back transaction undoes the activation done inside it.
+
+    e.g.
+    symbols = FamilySymbolRegistry(doc, BuiltInCategory.OST_Planting)
+    oak     = symbols.get('Scarlet Oak - 12.5 Meters')
+    with Transaction(doc, 'Plant') as t:
+        t.Start()
+        symbols.activate(oak)
+        ..."""
+
+    def __init__(self, doc, category=None):
+        """
+        :param doc:      Revit Document.
+        :param category: BuiltInCategory to limit the registry to, e.g. OST_Planting. All symbols by default."""
+        self.doc          = doc
+        self._by_type     = {}
+        self._by_family   = {}
+
+        collector = FilteredElementCollector(doc).OfClass(FamilySymbol)
+        if category is not None:
+            collector = collector.OfCategory(category)
+
+        for symbol in collector:
+            type_name   = symbol.get_Parameter(BuiltInParameter.SYMBOL_NAME_PARAM).AsString()
+            family_name = symbol.FamilyName
+            # The first symbol of a type name wins, like the collector lookups it replaces.
+            self._by_type.setdefault(type_name, symbol)
+            self._by_family[(family_name, type_name)] = symbol
+
+    def __len__(self):
+        return len(self._by_family)
+
+    def get(self, type_name, family_name=None):
+        """:param type_name:   Type name, e.g. 'Scarlet Oak - 12.5 Meters'
+        :param family_name: Family name, to pick the type of one family when the type name is shared.
+        :return:            FamilySymbol, None when the document has no such type."""
+        if family_name:
+            return self._by_family.get((family_name, type_name))
+        return self._by_type.get(type_name)
+
+    def activate(self, symbol):
+        """Activate a symbol that is not active yet, must be called inside a transaction."""
+        if not symbol.IsActive:
+            symbol.Activate()
+            self.doc.Regenerate()
+        return symbol
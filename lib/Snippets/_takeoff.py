@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter, ElementId, FamilyInstance, FilteredElementCollector, Level
+from Autodesk.Revit.DB import ElementMulticategoryFilter, ElementLevelFilter
+
+import clr
+clr.AddReference('System')
+from System.Collections.Generic import List
+from Snippets._type_cache import TypeParameterCache
+from Snippets._quantity_store import QuantityStore
+
+# VARIABLES
+FT3_TO_M3 = 35.315
+FT2_TO_M2 = 10.764
+FT_TO_M   = 3.2808
+
+COLUMNS       = 'columns'
+FRAMING       = 'framing'
+WALLS         = 'walls'
+FLOORS        = 'floors'
+STAIRS        = 'stairs'
+WINDOWS_DOORS = 'windows_doors'
+RAILINGS      = 'railings'
+FURNITURE     = 'furniture'
+ROOMS         = 'rooms'
+
+SECTIONS      = [COLUMNS, FRAMING, WALLS, FLOORS, STAIRS, WINDOWS_DOORS, RAILINGS, FURNITURE, ROOMS]
+SECTION_CODES = dict((section, code) for code, section in enumerate(SECTIONS))
+
+# Loadable family categories counted as furniture/devices when the whole model is collected.
+FURNITURE_CATEGORIES = [BuiltInCategory.OST_Furniture,
+                        BuiltInCategory.OST_FurnitureSystems,
+                        BuiltInCategory.OST_Casework,
+                        BuiltInCategory.OST_PlumbingFixtures,
+                        BuiltInCategory.OST_LightingFixtures,
+                        BuiltInCategory.OST_ElectricalFixtures,
+                        BuiltInCategory.OST_ElectricalEquipment,
+                        BuiltInCategory.OST_MechanicalEquipment,
+                        BuiltInCategory.OST_SpecialityEquipment,
+                        BuiltInCategory.OST_GenericModel]
+
+# Categories whose elements can bound a room, a change to one of them can change any room's area.
+ROOM_BOUNDING_CATEGORIES = set(int(category) for category in [BuiltInCategory.OST_Walls,
+                                                               BuiltInCategory.OST_Columns,
+                                                               BuiltInCategory.OST_StructuralColumns,
+                                                               BuiltInCategory.OST_Floors,
+                                                               BuiltInCategory.OST_Ceilings,
+                                                               BuiltInCategory.OST_Roofs,
+                                                               BuiltInCategory.OST_RoomSeparationLines])
+
+
+# FUNCTIONS
+def get_level_elevations(doc):
+    """Collect every Level of the document once.
+    :param doc: Revit Document.
+    :return:    dict, Level ElementId.IntegerValue -> elevation in meters"""
+    levels = FilteredElementCollector(doc).OfClass(Level).ToElements()
+    return {level.Id.IntegerValue: level.Elevation / FT_TO_M for level in levels}
+
+def collect_takeoff_elements(doc, view_id=None, level_id=None):
+    """Gather every takeoff candidate with a single collector.
+    Only quick filters are used (view scope, category, element type and level),
+    so Revit answers from its element index without expanding any element.
+    :param doc:      Revit Document.
+    :param view_id:  ElementId of a view to limit the takeoff to, None for the whole model.
+    :param level_id: ElementId of a level to limit the takeoff to, None for all levels.
+    :return:         List of Elements."""
+    categories = List[BuiltInCategory]([BuiltInCategory.OST_Columns,
+                                        BuiltInCategory.OST_StructuralFraming,
+                                        BuiltInCategory.OST_Walls,
+                                        BuiltInCategory.OST_Floors,
+                                        BuiltInCategory.OST_Stairs,
+                                        BuiltInCategory.OST_Doors,
+                                        BuiltInCategory.OST_Windows,
+                                        BuiltInCategory.OST_StairsRailing,
+                                        BuiltInCategory.OST_Rooms] + FURNITURE_CATEGORIES)
+
+    collector = FilteredElementCollector(doc, view_id) if view_id else FilteredElementCollector(doc)
+    collector = collector.WherePasses(ElementMulticategoryFilter(categories)).WhereElementIsNotElementType()
+    if level_id:
+        collector = collector.WherePasses(ElementLevelFilter(level_id))
+    return collector.ToElements()
+
+def get_dirty_categories(doc, element_ids):
+    """Categories of the elements a change journal names.
+    :param doc:         Revit Document.
+    :param element_ids: Iterable of integer element ids.
+    :return:            Set of integer category ids, None in it when an element has been deleted since."""
+    categories = set()
+    for element_id in element_ids:
+        element = doc.GetElement(ElementId(element_id))
+        if element is None:
+            categories.add(None)
+        elif element.Category is not None:
+            categories.add(element.Category.Id.IntegerValue)
+    return categories
+
+def _as_double(element, bip):
+    """Read a double parameter, 0.0 when the element does not carry it."""
+    param = element.get_Parameter(bip)
+    return param.AsDouble() if param else 0.0
+
+def _type_key(engine, element):
+    """Group instances by their type id, the name is resolved once per type."""
+    return element.GetTypeId().IntegerValue
+
+def _type_name(engine, element):
+    param = element.get_Parameter(engine.name_param)
+    return param.AsValueString() if param else ''
+
+def _room_key(engine, element):
+    """Rooms have no type, they are grouped by their name."""
+    param = element.get_Parameter(BuiltInParameter.ROOM_NAME)
+    return param.AsString() if param else ''
+
+def _level_elevation(engine, element, bip):
+    """Elevation in meters of the level an element parameter points to."""
+    param = element.get_Parameter(bip)
+    return engine.level_elevations.get(param.AsElementId().IntegerValue, 0.0) if param else 0.0
+
+def _extract_column(engine, element):
+    top_offset  = _as_double(element, BuiltInParameter.FAMILY_TOP_LEVEL_OFFSET_PARAM) / FT_TO_M
+    base_offset = _as_double(element, BuiltInParameter.FAMILY_BASE_LEVEL_OFFSET_PARAM) / FT_TO_M
+    top_height  = _level_elevation(engine, element, BuiltInParameter.FAMILY_TOP_LEVEL_PARAM)
+    base_height = _level_elevation(engine, element, BuiltInParameter.FAMILY_BASE_LEVEL_PARAM)
+
+    return {'volume': _as_double(element, BuiltInParameter.HOST_VOLUME_COMPUTED) / FT3_TO_M3,
+            'height': top_offset + top_height - base_offset - base_height}
+
+def _extract_framing(engine, element):
+    return {'volume': _as_double(element, BuiltInParameter.HOST_VOLUME_COMPUTED) / FT3_TO_M3,
+            'length': _as_double(element, BuiltInParameter.STRUCTURAL_FRAME_CUT_LENGTH) / FT_TO_M}
+
+def _extract_wall(engine, element):
+    return {'volume': _as_double(element, BuiltInParameter.HOST_VOLUME_COMPUTED) / FT3_TO_M3,
+            'length': _as_double(element, BuiltInParameter.CURVE_ELEM_LENGTH) / FT_TO_M,
+            'height': _as_double(element, BuiltInParameter.WALL_USER_HEIGHT_PARAM) / FT_TO_M}
+
+def _extract_floor(engine, element):
+    return {'volume': _as_double(element, BuiltInParameter.HOST_VOLUME_COMPUTED) / FT3_TO_M3}
+
+def _extract_stairs(engine, element):
+    param = element.get_Parameter(BuiltInParameter.STAIRS_ACTUAL_NUM_RISERS)
+    return {'risers': param.AsInteger() if param else 0}
+
+def _extract_railing(engine, element):
+    return {'length': _as_double(element, BuiltInParameter.CURVE_ELEM_LENGTH) / FT_TO_M}
+
+def _extract_count(engine, element):
+    return {}
+
+def _extract_room(engine, element):
+    area = _as_double(element, BuiltInParameter.ROOM_AREA) / FT2_TO_M2
+    # Unplaced or not enclosed rooms have no area and nothing to measure.
+    if not area:
+        return None
+    perimeter   = _as_double(element, BuiltInParameter.ROOM_PERIMETER) / FT_TO_M
+    volume      = _as_double(element, BuiltInParameter.ROOM_VOLUME) / FT3_TO_M3
+    wall_height = round(volume / area, 2)
+
+    return {'floor_area': area,
+            'ceiling_area': area,
+            'wall_area': perimeter * wall_height}
+
+
+# Category id -> (section, key function, name function, extractor)
+CATEGORY_DISPATCH = {
+    int(BuiltInCategory.OST_Columns):            (COLUMNS,       _type_key, _type_name, _extract_column),
+    int(BuiltInCategory.OST_StructuralFraming):  (FRAMING,       _type_key, _type_name, _extract_framing),
+    int(BuiltInCategory.OST_Walls):              (WALLS,         _type_key, _type_name, _extract_wall),
+    int(BuiltInCategory.OST_Floors):             (FLOORS,        _type_key, _type_name, _extract_floor),
+    int(BuiltInCategory.OST_Stairs):             (STAIRS,        _type_key, _type_name, _extract_stairs),
+    int(BuiltInCategory.OST_Doors):              (WINDOWS_DOORS, _type_key, _type_name, _extract_count),
+    int(BuiltInCategory.OST_Windows):            (WINDOWS_DOORS, _type_key, _type_name, _extract_count),
+    int(BuiltInCategory.OST_StairsRailing):      (RAILINGS,      _type_key, _type_name, _extract_railing),
+    int(BuiltInCategory.OST_Rooms):              (ROOMS,         _room_key, _room_key,  _extract_room),
+}
+
+# Every other loadable family instance (furniture, devices, ...) is only counted.
+FAMILY_INSTANCE_DISPATCH = (FURNITURE, _type_key, _type_name, _extract_count)
+
+
+# CLASSES
+class TypeTotals(object):
+    """Aggregated totals of all elements sharing one type (rooms: one name)."""
+
+    def __init__(self, key, type_name, type_id, count, totals):
+        self.key       = key
+        self.type_name = type_name
+        self.type_id   = type_id
+        self.count     = count
+        self.totals    = totals
+
+    def __getitem__(self, name):
+        return self.totals.get(name, 0.0)
+
+
+class TakeoffEngine(object):
+    """Single pass quantity takeoff shared by the Calculate panel buttons.
+
+    Every element is visited once and dispatched by its integer category id
+    to the extractor of its section. The extracted quantities are appended
+    as one row to self.store (QuantityStore) and summed per type on demand.
+    Type level values are read through self.type_cache, shared by all sections,
+    and level elevations come from one table collected at startup."""
+
+    def __init__(self, doc, name_param=BuiltInParameter.ELEM_FAMILY_AND_TYPE_PARAM, type_cache=None, level_elevations=None):
+        """
+        :param doc:              Revit Document the elements belong to.
+        :param name_param:       Instance parameter used as the type label in reports.
+        :param type_cache:       TypeParameterCache to share, a new one is created by default.
+        :param level_elevations: Level id -> elevation (m) table, collected from doc by default."""
+        self.doc              = doc
+        self.name_param       = name_param
+        self.type_cache       = type_cache or TypeParameterCache(doc)
+        self.level_elevations = level_elevations if level_elevations is not None else get_level_elevations(doc)
+        self.store            = QuantityStore()
+        self._aggregate       = None
+
+    def extract(self, element):
+        """Read the quantities of one element.
+        :param element: Revit Element of any category.
+        :return:        Record [section code, group key, name, type id (int), quantities],
+                        None when the element is not part of the takeoff."""
+        category = element.Category
+        if category is None:
+            return None
+
+        entry = CATEGORY_DISPATCH.get(category.Id.IntegerValue)
+        if entry is None:
+            if not isinstance(element, FamilyInstance):
+                return None
+            entry = FAMILY_INSTANCE_DISPATCH
+
+        section, key_function, name_function, extractor = entry
+        quantities = extractor(self, element)
+        if quantities is None:
+            return None
+
+        section_code = SECTION_CODES[section]
+        key   = key_function(self, element)
+        group = self.store.get_group(section_code, key)
+        if group is None:
+            name    = name_function(self, element)
+            type_id = element.GetTypeId().IntegerValue if key_function is _type_key else None
+        else:
+            name    = self.store.group_names[group]
+            type_id = self.store.group_type_ids[group]
+            type_id = type_id.IntegerValue if type_id is not None else None
+        return [section_code, key, name, type_id, quantities]
+
+    def add_record(self, record):
+        """Append a record from extract() (or from a TakeoffCache) to self.store."""
+        section_code, key, name, type_id, quantities = record
+        store = self.store
+        group = store.get_group(section_code, key)
+        if group is None:
+            group = store.add_group(section_code, key, name, ElementId(type_id) if type_id is not None else None)
+        store.append(group, quantities)
+        self._aggregate = None
+
+    def run(self, elements):
+        """Extract the quantities of the given elements into self.store.
+        :param elements: Iterable of Revit Elements (any category).
+        :return:         self.store"""
+        for element in elements:
+            record = self.extract(element)
+            if record is not None:
+                self.add_record(record)
+        return self.store
+
+    def run_incremental(self, elements, cache):
+        """Like run(), but only extract elements the cache cannot answer for.
+        Cached records are reused for unchanged elements, added and modified
+        elements are extracted. Records of elements outside this run are kept
+        for a later one while they are unchanged, those of deleted elements
+        are dropped. The cache is updated in place and can be saved afterwards.
+        :param elements: Iterable of Revit Elements (any category).
+        :param cache:    Loaded TakeoffCache.
+        :return:         self.store"""
+        dirty      = cache.dirty_ids
+        categories = get_dirty_categories(self.doc, dirty)
+        deleted    = None in categories
+        # Column heights depend on level elevations, a moved level re-extracts every column.
+        columns_dirty = not dirty.isdisjoint(self.level_elevations)
+        # A wall edit changes the walls joined to it without journaling them, and a deleted
+        # element may have been a wall, either re-extracts every wall.
+        walls_dirty   = deleted or int(BuiltInCategory.OST_Walls) in categories
+        # Room areas follow their bounding elements and the levels, without the rooms being journaled.
+        rooms_dirty   = walls_dirty or columns_dirty or not categories.isdisjoint(ROOM_BOUNDING_CATEGORIES)
+        dirty_codes   = set(SECTION_CODES[section] for section, is_dirty in
+                            [(COLUMNS, columns_dirty), (WALLS, walls_dirty), (ROOMS, rooms_dirty)] if is_dirty)
+
+        def is_stale(cached):
+            element_id, record = cached
+            if element_id in dirty:
+                return True
+            # Only rooms without area have no record, a room-bounding change may enclose them.
+            if record is None:
+                return rooms_dirty
+            return record[3] in dirty or record[0] in dirty_codes
+
+        old_records = cache.records
+        new_records = {}
+        for element in elements:
+            unique_id = element.UniqueId
+            cached    = old_records.get(unique_id)
+            if cached is not None and not is_stale(cached):
+                new_records[unique_id] = cached
+                record = cached[1]
+                if record is not None:
+                    self.add_record(record)
+                    cache.reused += 1
+                continue
+
+            record = self.extract(element)
+            new_records[unique_id] = [element.Id.IntegerValue, record]
+            if record is not None:
+                self.add_record(record)
+            cache.extracted += 1
+
+        # Elements left out of this run (another view or level) are not deleted ones.
+        for unique_id, cached in old_records.items():
+            if unique_id in new_records:
+                continue
+            if self.doc.GetElement(ElementId(cached[0])) is None:
+                cache.dropped += 1
+            elif not is_stale(cached):
+                new_records[unique_id] = cached
+
+        cache.records = new_records
+        return self.store
+
+    def aggregate(self):
+        """:return: (counts, sums) group-by of the store, computed once per run."""
+        if self._aggregate is None:
+            self._aggregate = self.store.aggregate()
+        return self._aggregate
+
+    def groups(self, section):
+        """:return: Group indices of a section in the store, in first-seen order."""
+        return self.store.groups_of(SECTION_CODES[section])
+
+    def section(self, section):
+        """:return: List of TypeTotals of a section, in first-seen order."""
+        store = self.store
+        counts, sums = self.aggregate()
+        return [TypeTotals(store.group_keys[group],
+                           store.group_names[group],
+                           store.group_type_ids[group],
+                           counts[group],
+                           dict((name, sums[name][group]) for name in store.quantities))
+                for group in self.groups(section)]
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+import hashlib
+import io
+import json
+import os
+
+from System.Diagnostics import Process
+from pyrevit.coreutils import appdata
+
+# VARIABLES
+CACHE_VERSION = 1
+
+# FUNCTIONS
+def get_session_token():
+    """:return: Text identifying the running Revit process, e.g. '10236-638345678901234567'"""
+    process = Process.GetCurrentProcess()
+    return '{}-{}'.format(process.Id, process.StartTime.Ticks)
+
+def get_cache_file(doc, name, ext='json'):
+    """:param doc:  Revit Document the file belongs to.
+    :param name: Short file name, e.g. 'csv' or 'journal'
+    :param ext:  File extension.
+    :return:     Path of a per-document file in the pyRevit app data folder."""
+    doc_key = hashlib.md5((doc.PathName or doc.Title).encode('utf-8')).hexdigest()[:12]
+    return appdata.get_data_file('Takeoff_{}_{}'.format(doc_key, name), ext)
+
+def get_journal_file(doc):
+    return get_cache_file(doc, 'journal', 'log')
+
+def record_changes(doc, element_ids):
+    """Append added, modified and deleted element ids to the change journal of a document.
+    Called by the doc-changed hook. Nothing is written until a takeoff cache
+    started the journal, so documents without a cache cost one os.path.exists.
+    :param doc:         Revit Document that changed.
+    :param element_ids: Iterable of ElementIds of changed elements."""
+    journal_path = get_journal_file(doc)
+    if not os.path.exists(journal_path):
+        return
+
+    lines = [u'{}\n'.format(element_id.IntegerValue) for element_id in element_ids]
+    if lines:
+        with io.open(journal_path, 'a', encoding='utf-8') as journal:
+            journal.writelines(lines)
+
+def _read_journal(journal_path, offset):
+    """:return: (session token, set of element ids written after offset), (None, None) without journal."""
+    if not os.path.exists(journal_path):
+        return None, None
+
+    with io.open(journal_path, 'rb') as journal:
+        session = journal.readline().strip().decode('utf-8')
+        journal.seek(max(offset, journal.tell()))
+        dirty_ids = set(int(line) for line in journal if line.strip())
+    return session, dirty_ids
+
+
+# CLASSES
+class TakeoffCache(object):
+    """Per-element takeoff records of the last run, keyed by UniqueId.
+
+    The change token is the position in the document's change journal, which
+    the doc-changed hook appends every added, modified and deleted element id to. Records are only
+    trusted within the Revit session that wrote them, since the journal misses
+    edits made while the hook was not running. Otherwise the cache starts empty
+    and the next run extracts everything.
+
+    e.g.
+    cache = TakeoffCache(doc, 'csv').load()
+    takeoff.run_incremental(elements, cache)
+    cache.save()"""
+
+    def __init__(self, doc, name):
+        """
+        :param doc:  Revit Document the takeoff runs on.
+        :param name: Cache name, one per report layout, e.g. 'csv' or 'cost'."""
+        self.path         = get_cache_file(doc, name)
+        self.journal_path = get_journal_file(doc)
+        self.session      = get_session_token()
+        self.records      = {}
+        self.dirty_ids    = set()
+        self.reused       = 0
+        self.extracted    = 0
+        self.dropped      = 0
+
+    def load(self):
+        """Read the records of the last run, if they can still be trusted.
+        :return: self"""
+        self.records   = {}
+        self.dirty_ids = set()
+        if not os.path.exists(self.path):
+            return self
+
+        try:
+            with io.open(self.path, 'r', encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+        except ValueError:
+            return self
+
+        if data.get('version') != CACHE_VERSION or data.get('session') != self.session:
+            return self
+
+        journal_session, dirty_ids = _read_journal(self.journal_path, data['journal_offset'])
+        if journal_session != self.session:
+            return self
+
+        self.records   = data['records']
+        self.dirty_ids = dirty_ids
+        return self
+
+    def save(self):
+        """Write the records and mark the current end of the journal as the new change token."""
+        journal_session, _ = _read_journal(self.journal_path, 0)
+        if journal_session != self.session:
+            with io.open(self.journal_path, 'w', encoding='utf-8') as journal:
+                journal.write(u'{}\n'.format(self.session))
+
+        data = {'version':        CACHE_VERSION,
+                'session':        self.session,
+                'journal_offset': os.path.getsize(self.journal_path),
+                'records':        self.records}
+        with io.open(self.path, 'wb') as cache_file:
+            cache_file.write(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    def stats(self):
+        """:return: Text summary of the last incremental run, e.g. 'reused: 9800, extracted: 12, dropped: 3'"""
+        return 'reused: {}, extracted: {}, dropped: {}'.format(self.reused, self.extracted, self.dropped)
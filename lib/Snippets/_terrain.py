@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from array import array
+
+from Autodesk.Revit.DB import GeometryInstance, Options, Solid, UV
+
+from Snippets._geometry import counterclockwise, polygon_area
+from Snippets._spatial import GridIndex
+
+# VARIABLES
+MIN_NORMAL_Z  = 0.1     # Faces pointing less upward than this are sides or bottom.
+FLAT_NORMAL_Z = 0.999   # Faces pointing more up or down than this are horizontal.
+TOLERANCE     = 1e-9
+
+# FUNCTIONS
+def iter_solids(geometry):
+    """Yield every Solid of a GeometryElement, looking into GeometryInstances."""
+    for geometry_object in geometry:
+        if isinstance(geometry_object, Solid):
+            yield geometry_object
+        elif isinstance(geometry_object, GeometryInstance):
+            for solid in iter_solids(geometry_object.GetInstanceGeometry()):
+                yield solid
+
+def face_normal(face):
+    """Normal at the middle of the face's UV bounding box."""
+    box = face.GetBoundingBox()
+    return face.ComputeNormal(UV((box.Min.U + box.Max.U) / 2, (box.Min.V + box.Max.V) / 2))
+
+def horizontal_face_loops(element, upward=True, options=None):
+    """Outlines of the flat top (or bottom) faces of an element, e.g. a site pad or a DirectShape mass.
+    :param element: Revit Element with solid geometry.
+    :param upward:  Top faces, bottom faces when False.
+    :param options: Geometry Options, default Options().
+    :return:        List of (ring, z), ring the counterclockwise outer loop of a face as (x, y) in feet."""
+    loops = []
+    for solid in iter_solids(element.get_Geometry(options or Options())):
+        for face in solid.Faces:
+            normal_z = face_normal(face).Z
+            if (normal_z if upward else -normal_z) < FLAT_NORMAL_Z:
+                continue
+            rings = []
+            for curve_loop in face.GetEdgesAsCurveLoops():
+                # Each curve repeats the end point of the previous one.
+                rings.append([point for curve in curve_loop for point in list(curve.Tessellate())[:-1]])
+            rings = [ring for ring in rings if len(ring) > 2]
+            if not rings:
+                continue
+            outer = max(rings, key=lambda ring: abs(polygon_area([(point.X, point.Y) for point in ring])))
+            loops.append((counterclockwise([(point.X, point.Y) for point in outer]), outer[0].Z))
+    return loops
+
+
+# CLASSES
+class TerrainSampler(object):
+    """Height field of a toposolid made of its upward facing triangles.
+
+    The triangles come from Face.Triangulate() and their corners are kept in
+    three flat array('d') (x, y, z, three entries per triangle). A GridIndex
+    over the triangle bounding boxes finds the few triangles under a point,
+    the height is interpolated with barycentric coordinates. Points outside
+    the terrain get the height of the plane of the closest triangle.
+
+    build() turns every triangle into the six coefficients of its first two
+    barycentric coordinates as linear functions of x and y. heights() groups
+    the points by grid cell and evaluates each triangle of a cell against all
+    points of the cell at once.
+    Units are those of the coordinates, internal feet for a Revit element.
+
+    e.g.
+    terrain = TerrainSampler.from_element(toposolid)
+    heights = terrain.heights([p.X for p in points], [p.Y for p in points])"""
+
+    def __init__(self):
+        self.xs    = array('d')
+        self.ys    = array('d')
+        self.zs    = array('d')
+        self.coefficients = array('d')
+        self.index = None
+
+    def __len__(self):
+        return len(self.xs) // 3
+
+    @classmethod
+    def from_element(cls, element, options=None, cell_size=None):
+        """Triangulate the upward faces of an element, e.g. a Toposolid.
+        :param element:   Revit Element with solid geometry.
+        :param options:   Geometry Options, default Options().
+        :param cell_size: Grid cell size (ft), defaults to the mean triangle size.
+        :return:          TerrainSampler ready for queries."""
+        sampler = cls()
+        for solid in iter_solids(element.get_Geometry(options or Options())):
+            for face in solid.Faces:
+                if face_normal(face).Z < MIN_NORMAL_Z:
+                    continue
+                mesh = face.Triangulate()
+                for number in range(mesh.NumTriangles):
+                    triangle = mesh.get_Triangle(number)
+                    sampler.add_triangle(*[triangle.get_Vertex(corner) for corner in range(3)])
+        return sampler.build(cell_size)
+
+    def add_triangle(self, point0, point1, point2):
+        """:param point0: Corner with X, Y and Z (e.g. XYZ), same for point1 and point2."""
+        for point in (point0, point1, point2):
+            self.xs.append(point.X)
+            self.ys.append(point.Y)
+            self.zs.append(point.Z)
+        self.index = None
+
+    def build(self, cell_size=None):
+        """Index the triangles, called once after the last add_triangle.
+        :return: self"""
+        xs, ys = self.xs, self.ys
+        boxes  = []
+        # l0 = a0 * x + b0 * y + c0 and l1 = a1 * x + b1 * y + c1, nan for a triangle without area.
+        coefficients = array('d')
+        nan = float('nan')
+        for first in range(0, len(xs), 3):
+            x0, y0, x1, y1, x2, y2 = xs[first], ys[first], xs[first + 1], ys[first + 1], xs[first + 2], ys[first + 2]
+            boxes.append((min(x0, x1, x2), min(y0, y1, y2), max(x0, x1, x2), max(y0, y1, y2)))
+            area = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+            if abs(area) < TOLERANCE:
+                coefficients.extend([nan] * 6)
+                continue
+            a0, b0 = (y1 - y2) / area, (x2 - x1) / area
+            a1, b1 = (y2 - y0) / area, (x0 - x2) / area
+            coefficients.extend([a0, b0, -a0 * x2 - b0 * y2, a1, b1, -a1 * x2 - b1 * y2])
+        self.coefficients = coefficients
+        self.index = GridIndex.from_items(range(len(boxes)), boxes, cell_size)
+        return self
+
+    def height_at(self, x, y):
+        """:return: Terrain height at (x, y), None for an empty terrain."""
+        index = self.index
+        point = (x, y, x, y)
+        candidates = index.query(point) or index.nearest(point)
+        if not candidates:
+            return None
+
+        zs, coefficients = self.zs, self.coefficients
+        best_weight, best_height = None, None
+        for triangle in candidates:
+            a0, b0, c0, a1, b1, c1 = coefficients[triangle * 6:triangle * 6 + 6]
+            if a0 != a0:
+                continue
+            first = triangle * 3
+            l0 = a0 * x + b0 * y + c0
+            l1 = a1 * x + b1 * y + c1
+            l2 = 1.0 - l0 - l1
+            height = l0 * zs[first] + l1 * zs[first + 1] + l2 * zs[first + 2]
+
+            # Inside a triangle every weight is >= 0, keep the highest surface there.
+            # Outside, the triangle the point is least outside of wins.
+            weight = min(l0, l1, l2)
+            if weight >= -TOLERANCE:
+                weight = 0.0
+                if best_weight == 0.0 and height < best_height:
+                    continue
+            elif best_weight is not None and weight <= best_weight:
+                continue
+            best_weight, best_height = weight, height
+        return best_height
+
+    def heights(self, xs, ys):
+        """Batch query, e.g. every vertex of every footprint at once.
+        :param xs: Sequence of X coordinates.
+        :param ys: Sequence of Y coordinates, same length.
+        :return:   array('d') of heights, nan where the terrain is empty."""
+        xs, ys = list(xs), list(ys)
+        index, zs, coefficients = self.index, self.zs, self.coefficients
+        nan = float('nan')
+        result = array('d', [nan]) * len(xs)
+
+        by_cell = {}
+        for number, (x, y) in enumerate(zip(xs, ys)):
+            by_cell.setdefault(index.cell_of(x, y), []).append(number)
+
+        for cell, numbers in by_cell.items():
+            cell_xs = [xs[number] for number in numbers]
+            cell_ys = [ys[number] for number in numbers]
+            best    = [None] * len(numbers)
+
+            # Every triangle that can contain a point of the cell, against all points of the cell.
+            for triangle in index.cell_items(cell):
+                a0, b0, c0, a1, b1, c1 = coefficients[triangle * 6:triangle * 6 + 6]
+                if a0 != a0:
+                    continue
+                first = triangle * 3
+                z0, z1, z2 = zs[first], zs[first + 1], zs[first + 2]
+                l0s = [a0 * x + b0 * y + c0 for x, y in zip(cell_xs, cell_ys)]
+                l1s = [a1 * x + b1 * y + c1 for x, y in zip(cell_xs, cell_ys)]
+                for position, (l0, l1) in enumerate(zip(l0s, l1s)):
+                    l2 = 1.0 - l0 - l1
+                    if l0 < -TOLERANCE or l1 < -TOLERANCE or l2 < -TOLERANCE:
+                        continue
+                    # Inside several triangles, the highest surface wins like in height_at().
+                    height = l0 * z0 + l1 * z1 + l2 * z2
+                    if best[position] is None or height > best[position]:
+                        best[position] = height
+
+            for number, height in zip(numbers, best):
+                # Outside every triangle (a hole or beyond the edge): the closest triangle's plane.
+                if height is None:
+                    height = self.height_at(xs[number], ys[number])
+                result[number] = nan if height is None else height
+        return result
+
+    def lift(self, points):
+        """Vertical distance from the lowest of the points up to the lowest terrain
+        height under them, negative when the terrain lies below.
+        :param points: Points with X, Y and Z, e.g. PolyLine.GetCoordinates().
+        :return:       Distance in the units of the points."""
+        return self.lift_many([points])[0]
+
+    def lift_many(self, point_lists):
+        """lift() of many point sets (e.g. every footprint of a layer) with one heights() call.
+        :return: List of distances, one per point set."""
+        return [profile.lift for profile in self.profiles(point_lists)]
+
+    def profile(self, points):
+        """Terrain heights under a point set, e.g. the corners of a site boundary.
+        :param points: Points with X, Y and Z, e.g. PolyLine.GetCoordinates().
+        :return:       TerrainProfile"""
+        return self.profiles([points])[0]
+
+    def profiles(self, point_lists):
+        """profile() of many point sets with one heights() call.
+        :return: List of TerrainProfile, one per point set."""
+        point_lists = [list(points) for points in point_lists]
+        heights = self.heights([point.X for points in point_lists for point in points],
+                               [point.Y for points in point_lists for point in points])
+        profiles, first = [], 0
+        for points in point_lists:
+            last = first + len(points)
+            profiles.append(TerrainProfile(heights[first:last], min(point.Z for point in points)))
+            first = last
+        return profiles
+
+
+class TerrainProfile(object):
+    """Terrain heights sampled under the points of one outline, in the units of the points.
+
+    pad_level is the height suggested for a flat pad on the outline: the
+    lowest terrain height under it, so the pad never hangs above the ground.
+    All values are nan when no point has terrain under it."""
+
+    def __init__(self, heights, base):
+        """
+        :param heights: Terrain height under every point, nan where there is none.
+        :param base:    Lowest Z of the points themselves."""
+        heights = [height for height in heights if height == height]
+        nan = float('nan')
+        self.count   = len(heights)
+        self.base    = base
+        self.minimum = min(heights) if heights else nan
+        self.maximum = max(heights) if heights else nan
+        self.mean    = sum(heights) / len(heights) if heights else nan
+
+    @property
+    def pad_level(self):
+        return self.minimum
+
+    @property
+    def lift(self):
+        """Vertical distance from the points up to pad_level, negative when the terrain lies below."""
+        return self.pad_level - self.base
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+# IMPORTS
+from Autodesk.Revit.DB import ElementId
+
+# VARIABLES
+INVALID_ID = ElementId.InvalidElementId.IntegerValue
+
+# CLASSES
+class TypeParameterCache(object):
+    """Memoize element types and their parameters for one run.
+    Thousands of instances share a few dozen types, so every type and every
+    type parameter is read from the document once and then served from a
+    dictionary keyed by the integer ElementId.
+
+    e.g.
+    cache = TypeParameterCache(doc)
+    cost  = cache.get_double(element.GetTypeId(), BuiltInParameter.ALL_MODEL_COST)"""
+
+    def __init__(self, doc):
+        self.doc     = doc
+        self.hits    = 0
+        self.misses  = 0
+        self._types  = {}
+        self._values = {}
+
+    def _load_type(self, type_id):
+        key = type_id.IntegerValue
+        if key not in self._types:
+            self._types[key] = self.doc.GetElement(type_id) if key != INVALID_ID else None
+        return self._types[key]
+
+    def get_type(self, type_id):
+        """:param type_id: ElementId of an element type.
+        :return:        The element type, None for an invalid id."""
+        if type_id.IntegerValue in self._types:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return self._load_type(type_id)
+
+    def get_type_of(self, element):
+        return self.get_type(element.GetTypeId())
+
+    def _get_value(self, type_id, bip, reader, default):
+        key = (type_id.IntegerValue, int(bip), reader)
+        try:
+            value = self._values[key]
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            element_type = self._load_type(type_id)
+            param = element_type.get_Parameter(bip) if element_type else None
+            value = self._values[key] = getattr(param, reader)() if param and param.HasValue else default
+        return value
+
+    def get_double(self, type_id, bip, default=0.0):
+        """Read a double type parameter.
+        :param type_id: ElementId of the element type.
+        :param bip:     BuiltInParameter to read.
+        :param default: Value returned when the type does not carry the parameter.
+        :return:        Parameter value in internal units."""
+        return self._get_value(type_id, bip, 'AsDouble', default)
+
+    def get_string(self, type_id, bip, default=''):
+        return self._get_value(type_id, bip, 'AsString', default)
+
+    def get_value_string(self, type_id, bip, default=''):
+        return self._get_value(type_id, bip, 'AsValueString', default)
+
+    def stats(self):
+        """:return: Text summary of the cache counters, e.g. 'hits: 1520, misses: 38'"""
+        return 'hits: {}, misses: {}'.format(self.hits, self.misses)